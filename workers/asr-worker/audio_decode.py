@@ -0,0 +1,109 @@
+import os
+import struct
+import subprocess
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Only the end of ffmpeg's error log goes into the exception message
+STDERR_TAIL_BYTES = 4096
+
+
+def normalized_data_range(path: str, sample_rate: int = SAMPLE_RATE):
+    """Return (offset, num_samples) of the sample data when `path` is already
+    a mono float32 WAV at `sample_rate`, as written by probe-worker's /normalize"""
+    with open(path, "rb") as f:
+        head = f.read(4096)
+        file_size = os.fstat(f.fileno()).st_size
+    if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    position = 12
+    while position + 8 <= len(head):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", head, position)
+        body = position + 8
+        if chunk_id == b"fmt " and body + 16 <= len(head):
+            fmt = struct.unpack_from("<HHIIHH", head, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, rate, _, _, bits = fmt
+            if (audio_format, channels, rate, bits) != (0x0003, 1, sample_rate, 32):
+                return None
+            return body, min(chunk_size, file_size - body) // 4
+        position = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def load_normalized(path: str, mmap_threshold_bytes: int, sample_rate: int = SAMPLE_RATE) -> Optional[np.ndarray]:
+    """Read a pre-normalized WAV without running ffmpeg, or None if it is not one"""
+    data_range = normalized_data_range(path, sample_rate)
+    if data_range is None:
+        return None
+    offset, num_samples = data_range
+    if num_samples == 0:
+        return np.zeros(0, dtype=np.float32)
+    if num_samples * 4 <= mmap_threshold_bytes:
+        return np.fromfile(path, dtype="<f4", count=num_samples, offset=offset)
+    return np.memmap(path, dtype="<f4", mode="c", offset=offset, shape=(num_samples,))
+
+
+def decode_audio(
+    path: str,
+    mmap_threshold_bytes: int,
+    sample_rate: int = SAMPLE_RATE,
+    timeout_seconds: Optional[float] = None,
+) -> np.ndarray:
+    """Decode any container to 16 kHz mono float32 in a single ffmpeg pass.
+
+    ffmpeg writes float32 samples straight to a scratch file and its log to
+    a temporary file, so no pipe can fill up and stall it; it is killed
+    after `timeout_seconds`. Small results are read into memory; larger ones
+    are memory-mapped copy-on-write so the pages are only loaded as the
+    transcription and alignment stages touch them. Artifacts that are
+    already 16 kHz mono float are loaded directly.
+    """
+    normalized = load_normalized(path, mmap_threshold_bytes, sample_rate)
+    if normalized is not None:
+        return normalized
+
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-v", "error",
+        "-threads", "0",
+        "-i", path,
+        "-f", "f32le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+
+    fd, scratch_path = tempfile.mkstemp(suffix=".f32")
+    try:
+        with os.fdopen(fd, "wb") as scratch, tempfile.TemporaryFile() as log:
+            process = subprocess.Popen(cmd, stdout=scratch, stderr=log)
+            try:
+                returncode = process.wait(timeout=timeout_seconds)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise RuntimeError(f"Decoding audio timed out after {timeout_seconds}s")
+            if returncode != 0:
+                log_size = log.seek(0, os.SEEK_END)
+                log.seek(max(0, log_size - STDERR_TAIL_BYTES))
+                stderr = log.read().decode(errors="replace").strip()
+                raise RuntimeError(f"Failed to decode audio: {stderr}")
+
+        size = os.path.getsize(scratch_path)
+        if size == 0:
+            return np.zeros(0, dtype=np.float32)
+        if size <= mmap_threshold_bytes:
+            return np.fromfile(scratch_path, dtype="<f4")
+        # The mapping stays valid after the scratch file is unlinked below
+        return np.memmap(scratch_path, dtype="<f4", mode="c")
+    finally:
+        os.remove(scratch_path)
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# The pipeline's tokenizer is mutable state, so one batch runs per model at a time
+_model_locks: Dict[int, threading.Lock] = {}
+_model_locks_guard = threading.Lock()
+
+
+class TranscriptionBatcher:
+    """Coalesce concurrent jobs that share a key into a single batched run.
+
+    Jobs are held for at most `window_seconds` (or until `max_batch_size`
+    jobs are waiting), then handed to `run_batch` together. Each caller gets
+    back the result at its own position in the batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        window_seconds: float,
+        max_batch_size: int,
+    ):
+        self.run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.jobs = 0
+        self.batch_sizes: Counter = Counter()
+
+    async def submit(self, key: Hashable, payload: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._pending.setdefault(key, [])
+        queue.append((payload, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window_seconds, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        # Skip jobs whose callers have already gone away
+        batch = [(payload, future) for payload, future in self._pending.pop(key, []) if not future.done()]
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(key, batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.jobs += len(batch)
+        self.batch_sizes[len(batch)] += 1
+
+        try:
+            results = await self.run_batch(key, [payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "average_batch_size": self.jobs / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "waiting": sum(len(queue) for queue in self._pending.values()),
+        }
+
+
+def transcribe_batch(
+    model,
+    audios: List[np.ndarray],
+    language: Optional[str],
+    batch_size: int,
+) -> List[Dict[str, Any]]:
+    """Transcribe several audios with one batched WhisperX pipeline pass.
+
+    FasterWhisperPipeline.transcribe only batches the VAD segments of a
+    single file, so this runs VAD per file and then feeds the segments of
+    every file through the pipeline together.
+
+    With `language` None each file's language is detected first. The
+    pipeline only detects when it has no tokenizer yet, and a shared model
+    keeps the tokenizer of its previous call, so it cannot be left to it.
+    Files are then batched per detected language.
+    """
+    with _model_locks_guard:
+        lock = _model_locks.setdefault(id(model), threading.Lock())
+
+    with lock:
+        if not hasattr(model, "vad_model"):
+            return [model.transcribe(audio, batch_size=batch_size, language=language) for audio in audios]
+        if language is not None:
+            return _transcribe_segments_together(model, audios, language, batch_size)
+
+        languages = [model.detect_language(audio) for audio in audios]
+        results: List[Dict[str, Any]] = [{} for _ in audios]
+        for detected in dict.fromkeys(languages):
+            indexes = [index for index, code in enumerate(languages) if code == detected]
+            batch = _transcribe_segments_together(model, [audios[index] for index in indexes], detected, batch_size)
+            for index, result in zip(indexes, batch):
+                results[index] = result
+        return results
+
+
+def _transcribe_segments_together(
+    model,
+    audios: List[np.ndarray],
+    language: str,
+    batch_size: int,
+) -> List[Dict[str, Any]]:
+    import torch
+    import faster_whisper
+    from whisperx.vad import merge_chunks
+
+    _set_tokenizer_language(model, language, faster_whisper)
+
+    spans = []
+    for index, audio in enumerate(audios):
+        vad_segments = model.vad_model({
+            "waveform": torch.from_numpy(audio).unsqueeze(0),
+            "sample_rate": SAMPLE_RATE,
+        })
+        vad_segments = merge_chunks(
+            vad_segments,
+            30,
+            onset=model._vad_params["vad_onset"],
+            offset=model._vad_params["vad_offset"],
+        )
+        for segment in vad_segments:
+            spans.append((index, segment["start"], segment["end"]))
+
+    def inputs():
+        for index, start, end in spans:
+            yield {"inputs": audios[index][int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]}
+
+    results = [{"segments": [], "language": language} for _ in audios]
+    for (index, start, end), out in zip(spans, model(inputs(), batch_size=batch_size, num_workers=0)):
+        text = out["text"]
+        if batch_size in [0, 1, None]:
+            text = text[0]
+        results[index]["segments"].append({
+            "text": text,
+            "start": round(start, 3),
+            "end": round(end, 3),
+        })
+    return results
+
+
+def _set_tokenizer_language(model, language: str, faster_whisper) -> None:
+    """Mirror the tokenizer setup FasterWhisperPipeline.transcribe performs"""
+    tokenizer = model.tokenizer
+    if tokenizer is not None and tokenizer.language_code == language and tokenizer.task == "transcribe":
+        return
+    model.tokenizer = faster_whisper.tokenizer.Tokenizer(
+        model.model.hf_tokenizer,
+        model.model.model.is_multilingual,
+        task="transcribe",
+        language=language,
+    )
@@ -0,0 +1,128 @@
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Bounded thread executor for CPU-bound inference with admission control.
+
+    At most `max_concurrency` calls run at once; up to `max_queue_depth`
+    further jobs may be admitted and wait for a slot. Anything beyond that
+    is rejected immediately with a retry hint.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue_depth: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="asr-inference",
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.completed = 0
+        self._wait_seconds: Deque[float] = deque(maxlen=1000)
+        self._run_seconds: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def capacity(self) -> int:
+        """Most jobs that can be admitted at once, running or queued"""
+        return self.max_concurrency + self.max_queue_depth
+
+    def retry_after(self, slots: int = 1) -> int:
+        """Estimate seconds until enough capacity frees up for `slots` jobs"""
+        average_run = sum(self._run_seconds) / len(self._run_seconds) if self._run_seconds else 1.0
+        backlog = self.in_flight + slots - self.max_concurrency - self.max_queue_depth
+        return max(1, math.ceil(average_run * max(1, backlog) / self.max_concurrency))
+
+    @asynccontextmanager
+    async def admission(self, slots: int = 1):
+        """Admit a job (or a batch of `slots` jobs) or raise QueueFullError"""
+        if self.in_flight + slots > self.capacity:
+            self.rejected += slots
+            raise QueueFullError(self.retry_after(slots))
+
+        self.in_flight += slots
+        self.admitted += slots
+        try:
+            yield
+        finally:
+            self.in_flight -= slots
+
+    def record_cancelled(self, slots: int = 1) -> None:
+        self.cancelled += slots
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the inference threads once a slot is free"""
+        enqueued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self._wait_seconds.append(time.perf_counter() - enqueued)
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+
+        def release(_future) -> None:
+            # Free the slot only when the thread is actually done with it
+            self.running -= 1
+            self._run_seconds.append(time.perf_counter() - started)
+            self._semaphore.release()
+
+        self.running += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self.running -= 1
+            self._semaphore.release()
+            raise
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+        result = await asyncio.wrap_future(future)
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_seconds)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4)
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "running": self.running,
+            "queue_depth": max(0, self.in_flight - self.running),
+            "waiting_for_slot": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "completed": self.completed,
+            "wait_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(waits[-1], 4) if waits else 0.0,
+            },
+        }
@@ -0,0 +1,305 @@
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+
+# Models loaded inside each pool process: one ASR model and a small LRU of
+# alignment models, keyed like the main model registry
+_process_asr_model: Optional[Tuple[Tuple, Any]] = None
+_process_align_models: "OrderedDict[Tuple, Any]" = OrderedDict()
+_process_align_cache_size = 1
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[int]:
+    """Pick chunk boundaries (in samples) at the quietest frame near each target"""
+    frame = int(FRAME_SECONDS * sample_rate)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [0, len(audio)]
+
+    # Per-frame RMS energy, computed in one vectorized pass
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+
+    chunk_frames = max(1, int(chunk_seconds / FRAME_SECONDS))
+    search_frames = int(search_seconds / FRAME_SECONDS)
+
+    points = [0]
+    target = chunk_frames
+    while target < n_frames - chunk_frames // 4:
+        lo = max(points[-1] // frame + 1, target - search_frames)
+        hi = min(n_frames, target + search_frames + 1)
+        split = lo + int(np.argmin(energy[lo:hi]))
+        points.append(split * frame)
+        target = split + chunk_frames
+    points.append(len(audio))
+    return points
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: float,
+    overlap_seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Dict[str, int]]:
+    """Return chunk windows: the owned range plus an overlapping decode range"""
+    points = find_split_points(audio, chunk_seconds, search_seconds, sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    chunks = []
+    for start, end in zip(points[:-1], points[1:]):
+        chunks.append({
+            "owned_start": start,
+            "owned_end": end,
+            "decode_start": max(0, start - overlap),
+            "decode_end": min(len(audio), end + overlap),
+        })
+    return chunks
+
+
+def _get_process_asr_model(key: Tuple, loader):
+    global _process_asr_model
+    if _process_asr_model is None or _process_asr_model[0] != key:
+        # Drop the previous model before loading, so two never coexist
+        _process_asr_model = None
+        _process_asr_model = (key, loader())
+    return _process_asr_model[1]
+
+
+def _get_process_align_model(key: Tuple, loader):
+    model = _process_align_models.get(key)
+    if model is not None:
+        _process_align_models.move_to_end(key)
+        return model
+    while len(_process_align_models) >= _process_align_cache_size:
+        _process_align_models.popitem(last=False)
+    model = loader()
+    _process_align_models[key] = model
+    return model
+
+
+def _init_pool_process(threads: int, align_cache_size: int) -> None:
+    global _process_align_cache_size
+    _process_align_cache_size = max(1, align_cache_size)
+    import torch
+    torch.set_num_threads(threads)
+
+
+def transcribe_chunk(
+    audio: np.ndarray,
+    offset_seconds: float,
+    model_size: str,
+    language: Optional[str],
+    device: str,
+    compute_type: str,
+) -> Dict[str, Any]:
+    """Transcribe and align one chunk; runs inside a pool process"""
+    import whisperx
+
+    model = _get_process_asr_model(
+        ("asr", model_size, device, compute_type),
+        lambda: whisperx.load_model(model_size, device, compute_type=compute_type),
+    )
+    # The cached pipeline keeps the previous chunk's tokenizer and would reuse
+    # its language, so detect explicitly when none was requested
+    result = model.transcribe(audio, language=language or model.detect_language(audio))
+    detected = result["language"]
+
+    model_a, metadata = _get_process_align_model(
+        ("align", detected, device),
+        lambda: whisperx.load_align_model(language_code=detected, device=device),
+    )
+    aligned = whisperx.align(result["segments"], model_a, metadata, audio, device)
+
+    return {
+        "language": detected,
+        "segments": [shift_segment(segment, offset_seconds) for segment in aligned["segments"]],
+    }
+
+
+def shift_segment(segment: Dict[str, Any], offset: float) -> Dict[str, Any]:
+    """Move a segment and its words from chunk time to global time"""
+    shifted = dict(segment)
+    for field in ("start", "end"):
+        if shifted.get(field) is not None:
+            shifted[field] = shifted[field] + offset
+    if "words" in segment:
+        words = []
+        for word in segment["words"]:
+            word = dict(word)
+            for field in ("start", "end"):
+                if word.get(field) is not None:
+                    word[field] = word[field] + offset
+            words.append(word)
+        shifted["words"] = words
+    return shifted
+
+
+def _midpoint(item: Dict[str, Any]) -> Optional[float]:
+    if item.get("start") is None or item.get("end") is None:
+        return None
+    return (item["start"] + item["end"]) / 2
+
+
+def stitch_segments(
+    chunk_results: List[Dict[str, Any]],
+    chunks: List[Dict[str, int]],
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Dict[str, Any]]:
+    """Merge chunk transcripts, dropping words decoded twice in the overlaps"""
+    stitched = []
+    for result, chunk in zip(chunk_results, chunks):
+        owned_start = chunk["owned_start"] / sample_rate
+        owned_end = chunk["owned_end"] / sample_rate
+        is_last = chunk is chunks[-1]
+
+        def owned(item: Dict[str, Any]) -> bool:
+            mid = _midpoint(item)
+            if mid is None:
+                return True
+            return owned_start <= mid and (mid < owned_end or is_last)
+
+        for segment in result["segments"]:
+            words = segment.get("words")
+            if not words:
+                if owned(segment):
+                    stitched.append(segment)
+                continue
+
+            kept = [word for word in words if owned(word)]
+            if not kept:
+                continue
+            # Words without timings belong to whichever chunk owns their segment
+            if all(_midpoint(word) is None for word in kept) and not owned(segment):
+                continue
+
+            segment = dict(segment)
+            if len(kept) != len(words):
+                segment["words"] = kept
+                segment["text"] = " ".join(word["word"].strip() for word in kept)
+                timed = [word for word in kept if word.get("start") is not None]
+                if timed:
+                    segment["start"] = timed[0]["start"]
+                    segment["end"] = timed[-1]["end"]
+            stitched.append(segment)
+
+    stitched.sort(key=lambda segment: segment.get("start") or 0.0)
+    return stitched
+
+
+class LongAudioTranscriber:
+    """Transcribe long recordings as silence-split chunks across a process pool.
+
+    Every pool process holds its own ASR model and up to `align_cache_size`
+    alignment models, so unless `workers` is set the pool gets only as many
+    processes as fit in `memory_budget_mb` for the requested model. The pool
+    is sized per model and replaced when another model size is requested.
+    On CUDA a single process is used, since every process would otherwise
+    put its own model copy on the one GPU.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int],
+        memory_budget_mb: float,
+        model_sizes_mb: Dict[str, float],
+        align_model_size_mb: float,
+        align_cache_size: int,
+        chunk_seconds: float,
+        search_seconds: float,
+        overlap_seconds: float,
+    ):
+        self.max_workers = workers
+        self.memory_budget_mb = memory_budget_mb
+        self.model_sizes_mb = model_sizes_mb
+        self.align_model_size_mb = align_model_size_mb
+        self.align_cache_size = max(1, align_cache_size)
+        self.chunk_seconds = chunk_seconds
+        self.search_seconds = search_seconds
+        self.overlap_seconds = overlap_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_key: Optional[Tuple[str, str]] = None
+        self.workers = 0
+
+    def workers_for(self, model_size: str, device: str) -> int:
+        if device == "cuda":
+            return 1
+        if self.max_workers:
+            return max(1, self.max_workers)
+        model_mb = self.model_sizes_mb.get(model_size, max(self.model_sizes_mb.values()))
+        process_mb = model_mb + self.align_cache_size * self.align_model_size_mb
+        return max(1, min(os.cpu_count() or 1, int(self.memory_budget_mb // process_mb)))
+
+    def pool(self, model_size: str, device: str) -> ProcessPoolExecutor:
+        if self._pool is not None and self._pool_key != (model_size, device):
+            # Running chunks finish; the old processes exit afterwards
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            self.workers = self.workers_for(model_size, device)
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # Torch and CTranslate2 are not fork-safe, so always spawn
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pool_process,
+                initargs=(threads, self.align_cache_size),
+            )
+            self._pool_key = (model_size, device)
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+            self._pool_key = None
+
+    async def transcribe(
+        self,
+        audio: np.ndarray,
+        model_size: str,
+        language: Optional[str],
+        device: str,
+        compute_type: str,
+    ) -> Dict[str, Any]:
+        pool = self.pool(model_size, device)
+        # Use smaller chunks when that lets every pool process take part
+        duration = len(audio) / SAMPLE_RATE
+        chunk_seconds = min(self.chunk_seconds, max(60.0, duration / self.workers))
+        chunks = plan_chunks(audio, chunk_seconds, self.search_seconds, self.overlap_seconds)
+
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(
+                pool,
+                transcribe_chunk,
+                audio[chunk["decode_start"]:chunk["decode_end"]],
+                chunk["decode_start"] / SAMPLE_RATE,
+                model_size,
+                language,
+                device,
+                compute_type,
+            )
+            for chunk in chunks
+        ]
+        results = await asyncio.gather(*futures)
+
+        languages = [result["language"] for result in results]
+        return {
+            "segments": stitch_segments(results, chunks),
+            "language": max(set(languages), key=languages.count),
+            "duration": duration,
+            "chunks": len(chunks),
+        }
@@ -1,5 +1,9 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+MODULE_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 import uvicorn
@@ -8,11 +12,119 @@ from dotenv import load_dotenv
 import asyncio
 import aiofiles
 import tempfile
-import whisperx
-import torch
+import hashlib
+import json
+import re
+import uuid
+from model_registry import ModelRegistry
+from long_audio import LongAudioTranscriber
+from batching import TranscriptionBatcher, transcribe_batch
+from inference_executor import InferenceExecutor, QueueFullError
+from transcript_cache import TranscriptCache
+from streaming import StreamingSession, pcm_to_float32, resample
+from audio_decode import SAMPLE_RATE, decode_audio
+from vad import apply_vad, remap_segments
 
 load_dotenv()
 
+# Models preloaded in the background after startup; /ready waits for them
+WARMUP_ENABLED = os.getenv("ASR_WARMUP", "true").lower() == "true"
+WARMUP_MODELS = [size.strip() for size in os.getenv("ASR_WARMUP_MODELS", "base").split(",") if size.strip()]
+WARMUP_ALIGN_LANGUAGES = [
+    language.strip() for language in os.getenv("ASR_WARMUP_ALIGN_LANGUAGES", "en").split(",") if language.strip()
+]
+
+# Approximate resident size of each model, used for the registry memory budget
+ASR_MODEL_SIZES_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 1000,
+    "medium": 2600,
+    "large": 5000,
+    "large-v2": 5000,
+    "large-v3": 5000,
+}
+ALIGN_MODEL_SIZE_MB = float(os.getenv("ASR_ALIGN_MODEL_SIZE_MB", 1200))
+
+# Audio ingestion limits
+MAX_AUDIO_BYTES = int(os.getenv("ASR_MAX_AUDIO_BYTES", 1024 * 1024 * 1024))
+INGEST_CHUNK_BYTES = int(os.getenv("ASR_INGEST_CHUNK_BYTES", 1024 * 1024))
+# Decoded audio larger than this is memory-mapped instead of held in RAM
+DECODE_MMAP_THRESHOLD_BYTES = int(os.getenv("ASR_DECODE_MMAP_THRESHOLD_BYTES", 64 * 1024 * 1024))
+# ffmpeg is killed if a decode takes longer, freeing its inference slot
+DECODE_TIMEOUT_SECONDS = float(os.getenv("ASR_DECODE_TIMEOUT_SECONDS", 900))
+# probe-worker's /normalize writes <artifact_id>.wav here (shared volume);
+# /transcribe accepts an artifact_id instead of an audio_url
+ARTIFACT_DIR = os.getenv("ASR_ARTIFACT_DIR", "/artifacts/normalized")
+ARTIFACT_ID = re.compile(r"[0-9a-f]{64}")
+
+# Energy-based voice activity pre-stage that skips silence before ASR
+VAD_ENABLED = os.getenv("ASR_VAD_ENABLED", "true").lower() == "true"
+VAD_MIN_SKIP_FRACTION = float(os.getenv("ASR_VAD_MIN_SKIP_FRACTION", 0.05))
+
+# Long-audio mode: silence-split chunks transcribed across a process pool
+LONG_AUDIO_THRESHOLD_SECONDS = float(os.getenv("ASR_LONG_AUDIO_THRESHOLD_SECONDS", 600))
+
+# Micro-batching of concurrent short jobs that share a model and language
+BATCH_WINDOW_SECONDS = float(os.getenv("ASR_BATCH_WINDOW_MS", 50)) / 1000
+MAX_BATCH_SIZE = int(os.getenv("ASR_MAX_BATCH_SIZE", 8))
+INFERENCE_BATCH_SIZE = int(os.getenv("ASR_INFERENCE_BATCH_SIZE", 16))
+
+# Inference concurrency and admission control
+MAX_CONCURRENT_INFERENCE = int(os.getenv("ASR_MAX_CONCURRENT_INFERENCE", 2))
+MAX_QUEUE_DEPTH = int(os.getenv("ASR_MAX_QUEUE_DEPTH", 16))
+DISCONNECT_POLL_SECONDS = float(os.getenv("ASR_DISCONNECT_POLL_SECONDS", 1.0))
+
+# Content-addressed transcript cache
+CACHE_ENABLED = os.getenv("ASR_CACHE_ENABLED", "true").lower() == "true"
+CACHE_PATH = os.getenv("ASR_CACHE_PATH", os.path.join(tempfile.gettempdir(), "asr-cache", "transcripts.db"))
+CACHE_MAX_BYTES = int(os.getenv("ASR_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Live streaming over WebSocket
+STREAM_DECODE_INTERVAL_SECONDS = float(os.getenv("ASR_STREAM_DECODE_INTERVAL_SECONDS", 1.0))
+STREAM_MAX_BUFFER_SECONDS = float(os.getenv("ASR_STREAM_MAX_BUFFER_SECONDS", 15))
+
+model_registry = ModelRegistry(
+    memory_budget_mb=float(os.getenv("ASR_MODEL_MEMORY_BUDGET_MB", 8192))
+)
+
+long_audio_transcriber = LongAudioTranscriber(
+    # Unset: as many processes as fit the memory budget, one on CUDA
+    workers=int(os.getenv("ASR_LONG_AUDIO_WORKERS", 0)) or None,
+    memory_budget_mb=float(os.getenv("ASR_LONG_AUDIO_MEMORY_BUDGET_MB", model_registry.memory_budget_mb)),
+    model_sizes_mb=ASR_MODEL_SIZES_MB,
+    align_model_size_mb=ALIGN_MODEL_SIZE_MB,
+    align_cache_size=int(os.getenv("ASR_LONG_AUDIO_ALIGN_CACHE_SIZE", 2)),
+    chunk_seconds=float(os.getenv("ASR_LONG_AUDIO_CHUNK_SECONDS", 300)),
+    search_seconds=float(os.getenv("ASR_LONG_AUDIO_SILENCE_SEARCH_SECONDS", 5)),
+    overlap_seconds=float(os.getenv("ASR_LONG_AUDIO_OVERLAP_SECONDS", 1)),
+)
+
+transcript_cache = TranscriptCache(CACHE_PATH, CACHE_MAX_BYTES) if CACHE_ENABLED else None
+
+inference_executor = InferenceExecutor(
+    max_concurrency=MAX_CONCURRENT_INFERENCE,
+    max_queue_depth=MAX_QUEUE_DEPTH,
+)
+
+transcription_batcher = TranscriptionBatcher(
+    run_batch=lambda key, audios: run_transcription_batch(key, audios),
+    window_seconds=BATCH_WINDOW_SECONDS,
+    max_batch_size=MAX_BATCH_SIZE,
+)
+
+live_sessions = {}
+
+# WhisperX pulls in torch and takes seconds to import, so it is loaded lazily
+_whisperx = None
+_device = None
+
+vad_totals = {"jobs": 0, "applied": 0, "audio_seconds": 0.0, "skipped_seconds": 0.0}
+
+readiness = {"status": "starting", "error": None}
+startup_timings = {"model_loads": {}}
+background_tasks = set()
+
 app = FastAPI(title="ASR Worker", version="1.0.0")
 
 # CORS middleware
@@ -25,98 +137,580 @@ app.add_middleware(
 )
 
 class TranscriptionRequest(BaseModel):
-    audio_url: str
+    # Exactly one of audio_url or artifact_id (from probe-worker's /normalize)
+    audio_url: Optional[str] = None
+    artifact_id: Optional[str] = None
     language: Optional[str] = "en"
     model_size: Optional[str] = "base"
+    long_audio: Optional[bool] = None
 
 class TranscriptionResponse(BaseModel):
     text: str
     segments: List[dict]
     language: str
     duration: float
+    cached: bool = False
+    vad: Optional[dict] = None
+
+class BatchTranscriptionRequest(BaseModel):
+    audio_urls: List[str]
+    language: Optional[str] = "en"
+    model_size: Optional[str] = "base"
+
+class BatchTranscriptionItem(BaseModel):
+    audio_url: str
+    result: Optional[TranscriptionResponse] = None
+    error: Optional[str] = None
+
+class BatchTranscriptionResponse(BaseModel):
+    results: List[BatchTranscriptionItem]
+
+APP_IMPORTED = time.perf_counter()
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "asr-worker"}
 
-@app.post("/transcribe", response_model=TranscriptionResponse)
-async def transcribe_audio(request: TranscriptionRequest):
+@app.get("/ready")
+async def readiness_check():
+    """Report whether the configured models are loaded and serving"""
+    body = {
+        "service": "asr-worker",
+        **readiness,
+        "models_loaded": [model["key"] for model in model_registry.stats()["models"]],
+        "startup_timings": startup_timings,
+    }
+    return JSONResponse(status_code=200 if readiness["status"] == "ready" else 503, content=body)
+
+@app.on_event("startup")
+async def startup():
+    startup_timings["app_import_seconds"] = round(APP_IMPORTED - MODULE_STARTED, 3)
+    if WARMUP_ENABLED:
+        task = asyncio.create_task(warm_up())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    else:
+        readiness["status"] = "ready"
+        startup_timings["ready_seconds"] = round(time.perf_counter() - MODULE_STARTED, 3)
+
+async def warm_up():
+    """Import WhisperX and preload the configured models in the background"""
+    readiness["status"] = "warming"
     try:
-        # Download audio file
-        audio_path = await download_audio(request.audio_url)
-        
-        # Load model
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = whisperx.load_model(request.model_size, device)
-        
-        # Transcribe
-        result = model.transcribe(audio_path)
+        await load_whisperx()
+        for model_size in WARMUP_MODELS:
+            started = time.perf_counter()
+            await get_asr_model(model_size)
+            startup_timings["model_loads"][f"asr:{model_size}"] = round(time.perf_counter() - started, 3)
+        for language in WARMUP_ALIGN_LANGUAGES:
+            started = time.perf_counter()
+            await get_align_model(language)
+            startup_timings["model_loads"][f"align:{language}"] = round(time.perf_counter() - started, 3)
+        readiness["status"] = "ready"
+    except Exception as e:
+        readiness["status"] = "failed"
+        readiness["error"] = str(e)
+    startup_timings["ready_seconds"] = round(time.perf_counter() - MODULE_STARTED, 3)
+
+def import_whisperx():
+    """Import WhisperX and resolve the inference device (blocking)"""
+    global _whisperx, _device
+    if _whisperx is None:
+        started = time.perf_counter()
+        import torch
+        import whisperx
+        _device = "cuda" if torch.cuda.is_available() else "cpu"
+        _whisperx = whisperx
+        startup_timings["whisperx_import_seconds"] = round(time.perf_counter() - started, 3)
+    return _whisperx
+
+async def load_whisperx():
+    """Import WhisperX off the event loop on first use"""
+    if _whisperx is None:
+        await asyncio.to_thread(import_whisperx)
+    return _whisperx
+
+def get_device() -> str:
+    import_whisperx()
+    return _device
+
+def get_compute_type() -> str:
+    return os.getenv("ASR_COMPUTE_TYPE") or ("float16" if get_device() == "cuda" else "int8")
+
+@app.post("/transcribe", response_model=TranscriptionResponse)
+async def transcribe_audio(request: TranscriptionRequest, http_request: Request):
+    if (request.audio_url is None) == (request.artifact_id is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of audio_url or artifact_id")
+    
+    async def job():
+        if request.artifact_id is not None:
+            # Normalized artifacts are read in place and never deleted here
+            return await run_transcription(
+                artifact_path(request.artifact_id),
+                request.model_size,
+                request.language,
+                request.long_audio,
+                content_hash=request.artifact_id
+            )
         
-        # Align timestamps
-        model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
-        result = whisperx.align(result["segments"], model_a, metadata, audio_path, device)
+        # Download audio file
+        audio = await download_audio(request.audio_url)
         
-        # Clean up
-        os.remove(audio_path)
+        try:
+            return await run_transcription(
+                audio.path,
+                request.model_size,
+                request.language,
+                request.long_audio,
+                content_hash=audio.sha256
+            )
+        finally:
+            audio.cleanup()
+    
+    try:
+        result = await run_admitted(http_request, job)
         
         return TranscriptionResponse(
             text=result["text"],
             segments=result["segments"],
             language=result["language"],
-            duration=metadata["duration"]
+            duration=result["duration"],
+            cached=result["cached"],
+            vad=result.get("vad")
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/transcribe-file")
 async def transcribe_file(
+    http_request: Request,
     file: UploadFile = File(...),
     language: Optional[str] = "en",
-    model_size: Optional[str] = "base"
+    model_size: Optional[str] = "base",
+    long_audio: Optional[bool] = None
 ):
-    try:
+    async def job():
         # Save uploaded file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            audio_path = tmp_file.name
+        audio = await save_upload(file)
         
-        # Load model
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = whisperx.load_model(model_size, device)
-        
-        # Transcribe
-        result = model.transcribe(audio_path)
-        
-        # Align timestamps
-        model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
-        result = whisperx.align(result["segments"], model_a, metadata, audio_path, device)
-        
-        # Clean up
-        os.remove(audio_path)
+        try:
+            return await run_transcription(
+                audio.path, model_size, language, long_audio, content_hash=audio.sha256
+            )
+        finally:
+            audio.cleanup()
+    
+    try:
+        result = await run_admitted(http_request, job)
         
         return {
             "text": result["text"],
             "segments": result["segments"],
             "language": result["language"],
-            "duration": metadata["duration"]
+            "duration": result["duration"],
+            "cached": result["cached"],
+            "vad": result.get("vad")
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def download_audio(url: str) -> str:
+@app.post("/transcribe-batch", response_model=BatchTranscriptionResponse)
+async def transcribe_batch_urls(request: BatchTranscriptionRequest, http_request: Request):
+    """Transcribe a list of audio URLs, batching inference across them"""
+    if len(request.audio_urls) > inference_executor.capacity:
+        # Admission reserves a slot per URL, so this batch could never be admitted
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.audio_urls)} URLs exceeds the inference capacity of {inference_executor.capacity}; split it into smaller batches"
+        )
+    
+    async def transcribe_one(url: str) -> BatchTranscriptionItem:
+        try:
+            audio = await download_audio(url)
+            try:
+                result = await run_transcription(
+                    audio.path, request.model_size, request.language, content_hash=audio.sha256
+                )
+            finally:
+                audio.cleanup()
+            return BatchTranscriptionItem(audio_url=url, result=TranscriptionResponse(**result))
+        except HTTPException as e:
+            return BatchTranscriptionItem(audio_url=url, error=str(e.detail))
+        except Exception as e:
+            return BatchTranscriptionItem(audio_url=url, error=str(e))
+    
+    async def job():
+        return await asyncio.gather(*[transcribe_one(url) for url in request.audio_urls])
+    
+    results = await run_admitted(http_request, job, slots=max(1, len(request.audio_urls)))
+    return BatchTranscriptionResponse(results=results)
+
+@app.get("/batching/stats")
+async def batching_stats():
+    """Micro-batching window, batch-size histogram and queue statistics"""
+    return transcription_batcher.stats()
+
+@app.get("/inference/stats")
+async def inference_stats():
+    """Inference executor queue depth, wait time and admission statistics"""
+    return inference_executor.stats()
+
+@app.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    language: Optional[str] = "en",
+    model_size: Optional[str] = "base",
+    sample_rate: int = SAMPLE_RATE,
+    encoding: str = "pcm_s16le"
+):
+    """Incremental transcription of live PCM audio.
+    
+    Binary messages carry mono PCM frames; a text message {"type": "end"}
+    flushes the remaining audio. The server replies with "partial" messages
+    for the unstable tail and "final" messages once words are settled.
+    """
+    await websocket.accept()
+    session_id = session_id or uuid.uuid4().hex
+    
+    async def decode(audio):
+        return await decode_stream_window(audio, model_size, language)
+    
+    session = StreamingSession(
+        session_id,
+        decode,
+        STREAM_DECODE_INTERVAL_SECONDS,
+        STREAM_MAX_BUFFER_SECONDS,
+    )
+    live_sessions[session_id] = session
+    
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session_id})
+        
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes"):
+                samples = pcm_to_float32(message["bytes"], encoding)
+                session.append(resample(samples, sample_rate))
+                if session.ready():
+                    for output in await session.step():
+                        await websocket.send_json(output)
+            
+            elif message.get("text"):
+                control = json.loads(message["text"])
+                if control.get("type") == "end":
+                    for output in await session.step(final=True):
+                        await websocket.send_json(output)
+                    await websocket.send_json({"type": "end", **session.stats()})
+                    await websocket.close()
+                    break
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await websocket.send_json({"type": "error", "session_id": session_id, "detail": str(e)})
+        await websocket.close(code=1011)
+    finally:
+        live_sessions.pop(session_id, None)
+
+@app.get("/stream/stats")
+async def stream_stats():
+    """Active live sessions and their buffer state"""
+    return {
+        "active_sessions": len(live_sessions),
+        "sessions": [session.stats() for session in live_sessions.values()],
+    }
+
+@app.get("/vad/stats")
+async def vad_stats():
+    """Share of incoming audio skipped by the voice activity pre-stage"""
+    audio_seconds = vad_totals["audio_seconds"]
+    return {
+        "enabled": VAD_ENABLED,
+        **vad_totals,
+        "skipped_fraction": vad_totals["skipped_seconds"] / audio_seconds if audio_seconds else 0.0,
+    }
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Transcript cache size, hit rate and eviction statistics"""
+    if transcript_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **transcript_cache.stats()}
+
+@app.on_event("shutdown")
+async def shutdown():
+    long_audio_transcriber.shutdown()
+    inference_executor.shutdown()
+
+async def run_admitted(http_request: Request, job, slots: int = 1):
+    """Run a job under admission control, cancelling it if the client disconnects"""
+    try:
+        async with inference_executor.admission(slots):
+            task = asyncio.ensure_future(job())
+            try:
+                while True:
+                    done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+                    if done:
+                        return task.result()
+                    if await http_request.is_disconnected():
+                        inference_executor.record_cancelled(slots)
+                        raise HTTPException(status_code=499, detail="Client disconnected")
+            finally:
+                if not task.done():
+                    task.cancel()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@app.get("/models/stats")
+async def model_stats():
+    """Model registry hit/miss, load time and memory statistics"""
+    return model_registry.stats()
+
+async def get_asr_model(model_size: str):
+    """Fetch a WhisperX ASR model from the registry"""
+    whisperx = await load_whisperx()
+    device, compute_type = get_device(), get_compute_type()
+    key = ("asr", model_size, device, compute_type)
+    return await model_registry.get(
+        key,
+        lambda: whisperx.load_model(model_size, device, compute_type=compute_type),
+        ASR_MODEL_SIZES_MB.get(model_size, ASR_MODEL_SIZES_MB["large"]),
+    )
+
+async def get_align_model(language_code: str):
+    """Fetch a WhisperX alignment model and its metadata from the registry"""
+    whisperx = await load_whisperx()
+    device = get_device()
+    key = ("align", language_code, device)
+    return await model_registry.get(
+        key,
+        lambda: whisperx.load_align_model(language_code=language_code, device=device),
+        ALIGN_MODEL_SIZE_MB,
+    )
+
+async def run_transcription(
+    audio_path: str,
+    model_size: str,
+    language: Optional[str] = None,
+    long_audio: Optional[bool] = None,
+    content_hash: Optional[str] = None
+) -> dict:
+    """Transcribe and align an audio file, serving repeats from the transcript cache"""
+    await load_whisperx()
+    
+    cache_key = None
+    if transcript_cache is not None and content_hash:
+        cache_key = TranscriptCache.make_key(
+            content_hash,
+            model_size=model_size,
+            language=language,
+            compute_type=get_compute_type(),
+            align=True,
+            # VAD drops audio before the model, so its settings change the transcript
+            vad_enabled=VAD_ENABLED,
+            vad_min_skip_fraction=VAD_MIN_SKIP_FRACTION,
+        )
+        cached = await transcript_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+    
+    # Decode once; transcription and alignment both reuse this buffer
+    audio = await inference_executor.run(
+        decode_audio, audio_path, DECODE_MMAP_THRESHOLD_BYTES, SAMPLE_RATE, DECODE_TIMEOUT_SECONDS
+    )
+    duration = len(audio) / SAMPLE_RATE
+    
+    # Only speech regions go to the model; timestamps are mapped back afterwards
+    mapping, vad_stats = [], None
+    if VAD_ENABLED:
+        audio, mapping, vad_stats = await inference_executor.run(apply_vad, audio, VAD_MIN_SKIP_FRACTION)
+        record_vad_stats(vad_stats)
+    
+    if long_audio is None:
+        long_audio = len(audio) / SAMPLE_RATE >= LONG_AUDIO_THRESHOLD_SECONDS
+    
+    if long_audio:
+        result = await run_long_transcription(audio, model_size, language)
+    else:
+        # Concurrent jobs for the same model and language share one inference pass
+        result = await transcription_batcher.submit((model_size, language), audio)
+    
+    if mapping:
+        result = {**result, "segments": remap_segments(result["segments"], mapping)}
+    result = {**result, "duration": duration, "vad": vad_stats}
+    
+    if cache_key is not None:
+        await transcript_cache.put(cache_key, result)
+    return {**result, "cached": False}
+
+def record_vad_stats(stats: dict):
+    vad_totals["jobs"] += 1
+    vad_totals["applied"] += int(stats["applied"])
+    vad_totals["audio_seconds"] += stats["audio_seconds"]
+    vad_totals["skipped_seconds"] += stats["skipped_seconds"]
+
+async def run_transcription_batch(key: tuple, audios: list) -> list:
+    """Batched transcription followed by per-file alignment"""
+    model_size, language = key
+    model = await get_asr_model(model_size)
+    
+    # Transcribe
+    results = await inference_executor.run(
+        transcribe_batch, model, audios, language, INFERENCE_BATCH_SIZE
+    )
+    
+    # Align timestamps
+    outputs = []
+    for audio, result in zip(audios, results):
+        try:
+            outputs.append(await align_transcription(result, audio))
+        except Exception as e:
+            outputs.append(e)
+    return outputs
+
+async def align_transcription(result: dict, audio) -> dict:
+    """Align one transcription result and build the response payload"""
+    whisperx = await load_whisperx()
+    language = result["language"]
+    model_a, metadata = await get_align_model(language)
+    aligned = await inference_executor.run(
+        whisperx.align, result["segments"], model_a, metadata, audio, get_device()
+    )
+    segments = aligned["segments"]
+    
+    return {
+        "text": " ".join(segment["text"].strip() for segment in segments),
+        "segments": segments,
+        "language": language,
+        "duration": len(audio) / SAMPLE_RATE,
+    }
+
+async def decode_stream_window(audio, model_size: str, language: Optional[str]) -> list:
+    """Transcribe and align a live buffer, returning its words"""
+    model = await get_asr_model(model_size)
+    results = await inference_executor.run(
+        transcribe_batch, model, [audio], language, INFERENCE_BATCH_SIZE
+    )
+    result = results[0]
+    if not result["segments"]:
+        return []
+    
+    whisperx = await load_whisperx()
+    model_a, metadata = await get_align_model(result["language"])
+    aligned = await inference_executor.run(
+        whisperx.align, result["segments"], model_a, metadata, audio, get_device()
+    )
+    return [word for segment in aligned["segments"] for word in segment.get("words", [])]
+
+async def run_long_transcription(audio, model_size: str, language: Optional[str]) -> dict:
+    """Transcribe a long recording in parallel silence-split chunks"""
+    result = await long_audio_transcriber.transcribe(
+        audio, model_size, language, get_device(), get_compute_type()
+    )
+    segments = result["segments"]
+    
+    return {
+        "text": " ".join(segment["text"].strip() for segment in segments),
+        "segments": segments,
+        "language": result["language"],
+        "duration": result["duration"],
+    }
+
+class IngestedAudio:
+    """Audio written to a temporary file, with its size and content hash"""
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+    
+    def cleanup(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def write_chunks_to_temp_file(chunks, suffix: str = ".wav") -> IngestedAudio:
+    """Stream byte chunks to a temporary file, hashing and size-checking on the fly"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > MAX_AUDIO_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Audio exceeds maximum size of {MAX_AUDIO_BYTES} bytes"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    
+    return IngestedAudio(path, size, digest.hexdigest())
+
+async def download_audio(url: str) -> IngestedAudio:
     """Download audio file from URL to temporary file"""
     import httpx
     
     async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(response.content)
-            return tmp_file.name
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            
+            content_length = response.headers.get("content-length")
+            if content_length and int(content_length) > MAX_AUDIO_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Audio exceeds maximum size of {MAX_AUDIO_BYTES} bytes"
+                )
+            
+            return await write_chunks_to_temp_file(
+                response.aiter_bytes(INGEST_CHUNK_BYTES),
+                suffix=audio_suffix(url.split("?", 1)[0]),
+            )
+
+async def save_upload(file: UploadFile) -> IngestedAudio:
+    """Stream an uploaded file to a temporary file in bounded chunks"""
+    async def read_chunks():
+        while True:
+            chunk = await file.read(INGEST_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    
+    return await write_chunks_to_temp_file(read_chunks(), suffix=audio_suffix(file.filename))
+
+def artifact_path(artifact_id: str) -> str:
+    """Path of a normalized artifact; ids are hex digests, so they cannot leave ARTIFACT_DIR"""
+    if not ARTIFACT_ID.fullmatch(artifact_id):
+        raise HTTPException(status_code=400, detail="artifact_id must be a 64-character hex digest")
+    path = os.path.join(ARTIFACT_DIR, f"{artifact_id}.wav")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Artifact not found: {artifact_id}")
+    return path
+
+def audio_suffix(name: Optional[str]) -> str:
+    """Keep the original extension so ffmpeg can use it as a hint"""
+    ext = os.path.splitext(name or "")[1].lower()
+    return ext if ext and len(ext) <= 6 else ".wav"
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8001))
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ModelEntry:
+    def __init__(self, key: Hashable, model: Any, size_mb: float, load_seconds: float):
+        self.key = key
+        self.model = model
+        self.size_mb = size_mb
+        self.load_seconds = load_seconds
+        self.hits = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models with an LRU memory budget.
+
+    Models are keyed by any hashable tuple and loaded through a caller-supplied
+    loader. Concurrent requests for the same key share a single load, and the
+    least recently used models are evicted once the budget is exceeded.
+    """
+
+    def __init__(self, memory_budget_mb: float):
+        self.memory_budget_mb = memory_budget_mb
+        self._entries: "OrderedDict[Hashable, ModelEntry]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.deduplicated_loads = 0
+        self.load_failures = 0
+        self.total_load_seconds = 0.0
+
+    @property
+    def used_mb(self) -> float:
+        return sum(entry.size_mb for entry in self._entries.values())
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        size_mb: float,
+    ) -> Any:
+        """Return the model for `key`, loading it in a thread on a miss"""
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                entry.last_used = time.time()
+                self.hits += 1
+                return entry.model
+
+            task = self._loading.get(key)
+            if task is None:
+                self.misses += 1
+                # The load runs as its own task so that a cancelled caller
+                # neither aborts it nor fails the other waiters
+                task = asyncio.create_task(self._load(key, loader, size_mb))
+                task.add_done_callback(self._retrieve_exception)
+                self._loading[key] = task
+            else:
+                # Another request is already loading this model; wait for it
+                self.deduplicated_loads += 1
+
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Any], size_mb: float) -> Any:
+        try:
+            started = time.perf_counter()
+            model = await asyncio.get_running_loop().run_in_executor(None, loader)
+            load_seconds = time.perf_counter() - started
+        except BaseException:
+            async with self._lock:
+                self.load_failures += 1
+                self._loading.pop(key, None)
+            raise
+
+        async with self._lock:
+            self.total_load_seconds += load_seconds
+            self._entries[key] = ModelEntry(key, model, size_mb, load_seconds)
+            self._loading.pop(key, None)
+            self._evict(keep=key)
+        return model
+
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Task) -> None:
+        # Mark a failed load's exception as retrieved when nobody is waiting
+        if not task.cancelled():
+            task.exception()
+
+    def _evict(self, keep: Optional[Hashable] = None) -> None:
+        """Drop least recently used models until the budget is respected"""
+        while self.used_mb > self.memory_budget_mb and len(self._entries) > 1:
+            oldest_key = next(iter(self._entries))
+            if oldest_key == keep:
+                break
+            self._entries.pop(oldest_key)
+            self.evictions += 1
+
+    async def clear(self) -> None:
+        async with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "memory_budget_mb": self.memory_budget_mb,
+            "memory_used_mb": self.used_mb,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "deduplicated_loads": self.deduplicated_loads,
+            "load_failures": self.load_failures,
+            "total_load_seconds": round(self.total_load_seconds, 3),
+            "loading": [str(key) for key in self._loading],
+            "models": [
+                {
+                    "key": list(entry.key) if isinstance(entry.key, tuple) else entry.key,
+                    "size_mb": entry.size_mb,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "hits": entry.hits,
+                    "last_used": entry.last_used,
+                }
+                for entry in self._entries.values()
+            ],
+        }
@@ -0,0 +1,170 @@
+import re
+from typing import Any, Awaitable, Callable, Dict, List
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Words that start slightly before the committed point are repeats of committed words
+COMMIT_TOLERANCE_SECONDS = 0.05
+
+
+def pcm_to_float32(frame: bytes, encoding: str) -> np.ndarray:
+    """Convert a raw PCM frame to float32 samples in [-1, 1]"""
+    if encoding == "pcm_f32le":
+        return np.frombuffer(frame, dtype="<f4").astype(np.float32)
+    if encoding == "pcm_s16le":
+        return np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def resample(audio: np.ndarray, source_rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Linear resampling, good enough for speech frames arriving at 44.1/48 kHz"""
+    if source_rate == target_rate or len(audio) == 0:
+        return audio
+    target_length = int(round(len(audio) * target_rate / source_rate))
+    positions = np.linspace(0, len(audio) - 1, target_length)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _to_token(word: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "text": word["word"].strip(),
+        "confidence": word.get("score", 0.0),
+        "start": round(word["start"], 3),
+        "end": round(word["end"], 3),
+    }
+
+
+class StreamingSession:
+    """Incremental transcription state for one live audio stream.
+
+    Audio is kept in a rolling buffer that starts at the last committed
+    word. Each decode only covers that unstable tail; words that two
+    consecutive decodes agree on are finalized and trimmed from the buffer.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        decode: Callable[[np.ndarray], Awaitable[List[Dict[str, Any]]]],
+        decode_interval_seconds: float,
+        max_buffer_seconds: float,
+    ):
+        self.session_id = session_id
+        self.decode = decode
+        self.decode_interval_seconds = decode_interval_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0
+        self.pending_samples = 0
+        self.committed_until = 0.0
+        self.previous: List[Dict[str, Any]] = []
+        self.received_seconds = 0.0
+        self.decodes = 0
+        self.decoded_seconds = 0.0
+
+    @property
+    def buffer_seconds(self) -> float:
+        return len(self.buffer) / SAMPLE_RATE
+
+    def append(self, samples: np.ndarray) -> None:
+        self.buffer = np.concatenate([self.buffer, samples])
+        self.pending_samples += len(samples)
+        self.received_seconds += len(samples) / SAMPLE_RATE
+
+    def ready(self) -> bool:
+        return self.pending_samples >= self.decode_interval_seconds * SAMPLE_RATE
+
+    async def step(self, final: bool = False) -> List[Dict[str, Any]]:
+        """Decode the buffered tail and return partial/final messages"""
+        self.pending_samples = 0
+        if len(self.buffer) == 0:
+            return []
+
+        self.decodes += 1
+        self.decoded_seconds += self.buffer_seconds
+        words = self._place_words(await self.decode(self.buffer))
+
+        if final:
+            stable, unstable = words, []
+        else:
+            agreed = 0
+            for previous, current in zip(self.previous, words):
+                if _normalize(previous["word"]) != _normalize(current["word"]):
+                    break
+                agreed += 1
+            stable, unstable = words[:agreed], words[agreed:]
+
+        messages = []
+        if not stable and self.buffer_seconds > self.max_buffer_seconds:
+            # Never let the tail grow past the window
+            if len(words) > 1:
+                stable, unstable = words[:-1], words[-1:]
+            elif words:
+                self._trim_to(words[0]["start"])
+            else:
+                # Nothing but silence; drop it instead of decoding it again
+                self._trim_to(self.buffer_offset + self.buffer_seconds - self.decode_interval_seconds)
+
+        if stable:
+            messages.append(self._commit(stable))
+
+        self.previous = unstable
+        if unstable:
+            messages.append({
+                "type": "partial",
+                "session_id": self.session_id,
+                "text": " ".join(word["word"].strip() for word in unstable),
+                "tokens": [_to_token(word) for word in unstable],
+            })
+        return messages
+
+    def _place_words(self, words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Move words to the session timeline, filling in missing timings"""
+        placed = []
+        last_end = self.buffer_offset
+        for word in words:
+            start = word.get("start")
+            end = word.get("end")
+            start = last_end if start is None else start + self.buffer_offset
+            end = start if end is None else end + self.buffer_offset
+            last_end = end
+            if start < self.committed_until - COMMIT_TOLERANCE_SECONDS:
+                continue
+            placed.append({**word, "start": start, "end": end})
+        return placed
+
+    def _commit(self, words: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.committed_until = words[-1]["end"]
+        self._trim_to(self.committed_until)
+        return {
+            "type": "final",
+            "session_id": self.session_id,
+            "text": " ".join(word["word"].strip() for word in words),
+            "start": round(words[0]["start"], 3),
+            "end": round(words[-1]["end"], 3),
+            "tokens": [_to_token(word) for word in words],
+        }
+
+    def _trim_to(self, timestamp: float) -> None:
+        cut = int((timestamp - self.buffer_offset) * SAMPLE_RATE)
+        if cut <= 0:
+            return
+        cut = min(cut, len(self.buffer))
+        self.buffer = self.buffer[cut:]
+        self.buffer_offset += cut / SAMPLE_RATE
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "received_seconds": round(self.received_seconds, 3),
+            "buffer_seconds": round(self.buffer_seconds, 3),
+            "committed_until": round(self.committed_until, 3),
+            "decodes": self.decodes,
+            "decoded_seconds": round(self.decoded_seconds, 3),
+        }
@@ -0,0 +1,60 @@
+import os
+import stat
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from audio_decode import decode_audio
+
+# Stand-in for ffmpeg: writes `stderr_bytes` of log, then one second of
+# float32 samples to stdout, then sleeps `sleep` seconds and exits `code`
+STUB = """#!{python}
+import sys, time
+sys.stderr.write("x" * {stderr_bytes})
+sys.stderr.flush()
+sys.stdout.buffer.write(b"\\x00\\x00\\x80\\x3f" * 16000)
+sys.stdout.flush()
+time.sleep({sleep})
+sys.exit({code})
+"""
+
+
+@pytest.fixture
+def stub_ffmpeg(tmp_path, monkeypatch):
+    def install(stderr_bytes=0, sleep=0, code=0):
+        path = tmp_path / "ffmpeg"
+        path.write_text(STUB.format(python=sys.executable, stderr_bytes=stderr_bytes, sleep=sleep, code=code))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return install
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "input.mp3"
+    path.write_bytes(b"not really audio")
+    return str(path)
+
+
+def test_large_error_log_does_not_stall_decode(stub_ffmpeg, source):
+    stub_ffmpeg(stderr_bytes=2_000_000)
+    audio = decode_audio(source, 1 << 30, timeout_seconds=10)
+    assert len(audio) == 16000
+    assert np.all(audio == 1.0)
+
+
+def test_failure_reports_end_of_log(stub_ffmpeg, source):
+    stub_ffmpeg(stderr_bytes=2_000_000, code=1)
+    with pytest.raises(RuntimeError, match="Failed to decode audio: x+$") as error:
+        decode_audio(source, 1 << 30, timeout_seconds=10)
+    assert len(str(error.value)) < 5000
+
+
+def test_slow_decode_is_killed(stub_ffmpeg, source):
+    stub_ffmpeg(sleep=30)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="timed out"):
+        decode_audio(source, 1 << 30, timeout_seconds=1)
+    assert time.monotonic() - started < 10
@@ -0,0 +1,39 @@
+import numpy as np
+
+import batching
+from batching import transcribe_batch
+
+
+class FakePipeline:
+    """Stands in for FasterWhisperPipeline: each audio's first sample encodes its language"""
+
+    vad_model = None
+
+    def detect_language(self, audio):
+        return {1.0: "en", 2.0: "de"}[float(audio[0])]
+
+
+def test_auto_language_detects_each_file(monkeypatch):
+    calls = []
+
+    def together(model, audios, language, batch_size):
+        calls.append((language, [float(audio[0]) for audio in audios]))
+        return [{"segments": [], "language": language} for _ in audios]
+
+    monkeypatch.setattr(batching, "_transcribe_segments_together", together)
+    audios = [np.full(10, value, dtype=np.float32) for value in (1.0, 2.0, 1.0, 2.0)]
+
+    results = transcribe_batch(FakePipeline(), audios, None, 8)
+
+    assert [result["language"] for result in results] == ["en", "de", "en", "de"]
+    assert calls == [("en", [1.0, 1.0]), ("de", [2.0, 2.0])]
+
+
+def test_explicit_language_skips_detection(monkeypatch):
+    monkeypatch.setattr(
+        batching,
+        "_transcribe_segments_together",
+        lambda model, audios, language, batch_size: [{"segments": [], "language": language} for _ in audios],
+    )
+    audios = [np.full(10, 2.0, dtype=np.float32)]
+    assert transcribe_batch(FakePipeline(), audios, "fr", 8)[0]["language"] == "fr"
@@ -0,0 +1,45 @@
+import numpy as np
+
+from vad import SAMPLE_RATE, apply_vad, detect_speech
+
+
+def speech(seconds, level_dbfs, rng):
+    """Stand-in for a talker: noise at `level_dbfs` RMS, varying by a few dB
+    from one 200 ms syllable to the next"""
+    syllables = int(seconds * 5)
+    levels = np.repeat(10 ** (rng.uniform(-3, 3, syllables) / 20), SAMPLE_RATE // 5)
+    signal = rng.standard_normal(len(levels)) * levels
+    signal *= 10 ** (level_dbfs / 20) / np.sqrt(np.mean(signal ** 2))
+    return signal.astype(np.float32)
+
+
+def silence(seconds, rng, level_dbfs=-70):
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 10 ** (level_dbfs / 20)).astype(np.float32)
+
+
+def kept_seconds(regions, start, end):
+    start, end = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+    return sum(max(0, min(e, end) - max(s, start)) for s, e in regions) / SAMPLE_RATE
+
+
+def test_keeps_quiet_speaker_with_little_silence():
+    # 2 s lead-in, then 100 s of 5 s turns alternating at -15 and -30 dBFS
+    rng = np.random.default_rng(0)
+    turns = [speech(5, -15 if index % 2 == 0 else -30, rng) for index in range(20)]
+    audio = np.concatenate([silence(2, rng)] + turns)
+    regions = detect_speech(audio)
+
+    quiet = sum(kept_seconds(regions, 2 + 5 * index, 7 + 5 * index) for index in range(1, 20, 2))
+    loud = sum(kept_seconds(regions, 2 + 5 * index, 7 + 5 * index) for index in range(0, 20, 2))
+    assert quiet >= 49
+    assert loud >= 49
+
+
+def test_still_strips_long_silences():
+    rng = np.random.default_rng(1)
+    audio = np.concatenate([speech(10, -20, rng), silence(30, rng), speech(10, -35, rng), silence(20, rng)])
+    compact, mapping, stats = apply_vad(audio, min_skip_fraction=0.05)
+
+    assert stats["applied"]
+    assert 20 <= stats["speech_seconds"] <= 22
+    assert len(mapping) == 2
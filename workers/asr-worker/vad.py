@@ -0,0 +1,170 @@
+import bisect
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """Return [start, end) frame index pairs for each run of True values"""
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return edges.reshape(-1, 2)
+
+
+def detect_speech(
+    audio: np.ndarray,
+    frame_ms: float = 30,
+    margin_db: float = 12,
+    floor_db: float = -50,
+    ceiling_db: float = -40,
+    min_speech_ms: float = 250,
+    min_silence_ms: float = 500,
+    pad_ms: float = 200,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Tuple[int, int]]:
+    """Find speech regions (in samples) with an adaptive frame-energy threshold.
+
+    A frame is speech when its RMS level is `margin_db` above the estimated
+    noise floor (the 10th percentile frame level) and above `floor_db`.
+    Frames louder than `ceiling_db` always count as speech: with little
+    true silence the 10th percentile lands on the quieter talker, and the
+    adaptive threshold alone would cut them out. Short pauses are bridged,
+    short blips dropped, and regions padded so word onsets and tails are not
+    clipped.
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    frames = np.asarray(audio[: n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    level_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    noise_floor = np.percentile(level_db, 10)
+    speech = level_db > min(max(floor_db, noise_floor + margin_db), ceiling_db)
+
+    # Bridge pauses shorter than min_silence_ms
+    min_silence = int(min_silence_ms / frame_ms)
+    for start, end in _runs(~speech):
+        if end - start < min_silence and start > 0 and end < n_frames:
+            speech[start:end] = True
+
+    # Drop blips shorter than min_speech_ms
+    min_speech = int(min_speech_ms / frame_ms)
+    for start, end in _runs(speech):
+        if end - start < min_speech:
+            speech[start:end] = False
+
+    # Pad each region on both sides
+    pad = int(pad_ms / frame_ms)
+    if pad:
+        speech = np.convolve(speech.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode="same") > 0
+
+    regions = []
+    for start, end in _runs(speech):
+        end_sample = len(audio) if end == n_frames else int(end) * frame
+        regions.append((int(start) * frame, end_sample))
+    return regions
+
+
+def compact_audio(
+    audio: np.ndarray,
+    regions: List[Tuple[int, int]],
+    gap_seconds: float = 0.3,
+    sample_rate: int = SAMPLE_RATE,
+) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+    """Concatenate speech regions with short silent gaps between them.
+
+    Returns the compacted audio and a mapping of
+    (compact_start, original_start, length) tuples in seconds.
+    """
+    gap = np.zeros(int(gap_seconds * sample_rate), dtype=np.float32)
+    pieces = []
+    mapping = []
+    position = 0
+    for index, (start, end) in enumerate(regions):
+        if index:
+            pieces.append(gap)
+            position += len(gap)
+        pieces.append(np.asarray(audio[start:end], dtype=np.float32))
+        mapping.append((position / sample_rate, start / sample_rate, (end - start) / sample_rate))
+        position += end - start
+
+    if not pieces:
+        return np.zeros(0, dtype=np.float32), []
+    return np.concatenate(pieces), mapping
+
+
+def _remap(timestamp: float, starts: List[float], mapping: List[Tuple[float, float, float]]) -> float:
+    index = max(0, bisect.bisect_right(starts, timestamp) - 1)
+    compact_start, original_start, length = mapping[index]
+    # Times inside a gap are pinned to the end of the preceding region
+    return original_start + min(max(0.0, timestamp - compact_start), length)
+
+
+def remap_time(timestamp: float, mapping: List[Tuple[float, float, float]]) -> float:
+    """Convert a time in the compacted audio back to the original timeline"""
+    if not mapping:
+        return timestamp
+    return _remap(timestamp, [entry[0] for entry in mapping], mapping)
+
+
+def remap_segments(
+    segments: List[Dict[str, Any]],
+    mapping: List[Tuple[float, float, float]],
+) -> List[Dict[str, Any]]:
+    """Move segment and word timestamps back to the original timeline"""
+    if not mapping:
+        return segments
+    starts = [entry[0] for entry in mapping]
+
+    def remap_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        item = dict(item)
+        for field in ("start", "end"):
+            if item.get(field) is not None:
+                item[field] = round(_remap(item[field], starts, mapping), 3)
+        return item
+
+    remapped = []
+    for segment in segments:
+        segment = remap_item(segment)
+        if "words" in segment:
+            segment["words"] = [remap_item(word) for word in segment["words"]]
+        remapped.append(segment)
+    return remapped
+
+
+def apply_vad(
+    audio: np.ndarray,
+    min_skip_fraction: float,
+    sample_rate: int = SAMPLE_RATE,
+) -> Tuple[np.ndarray, List[Tuple[float, float, float]], Dict[str, Any]]:
+    """Strip non-speech from `audio`, returning the audio to transcribe,
+    the timestamp mapping (empty when unchanged) and per-job stats"""
+    total_seconds = len(audio) / sample_rate
+    regions = detect_speech(audio, sample_rate=sample_rate)
+    speech_seconds = sum(end - start for start, end in regions) / sample_rate
+    skipped_fraction = 1 - speech_seconds / total_seconds if total_seconds else 0.0
+
+    stats = {
+        "applied": False,
+        "regions": len(regions),
+        "audio_seconds": round(total_seconds, 3),
+        "speech_seconds": round(speech_seconds, 3),
+        "skipped_seconds": 0.0,
+        "skipped_fraction": 0.0,
+    }
+
+    # Not worth remapping for a small saving; and an empty result more likely
+    # means the threshold misfired on uniformly loud audio than true silence
+    if not regions or skipped_fraction < min_skip_fraction:
+        return audio, [], stats
+
+    compact, mapping = compact_audio(audio, regions, sample_rate=sample_rate)
+    stats.update({
+        "applied": True,
+        "skipped_seconds": round(total_seconds - speech_seconds, 3),
+        "skipped_fraction": round(skipped_fraction, 4),
+    })
+    return compact, mapping, stats
@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from extraction import extract_spans
+from gazetteer import Gazetteer
+
+BatchItem = Tuple[str, str]
+
+
+def extract_items(
+    items: Sequence[BatchItem],
+    entity_types: Optional[List[str]],
+    gazetteer: Optional[Gazetteer] = None,
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Extract entities from each (id, text); runs inline or in a pool process"""
+    return [
+        (item_id, [span.to_dict() for span in extract_spans(text, entity_types, gazetteer=gazetteer)])
+        for item_id, text in items
+    ]
+
+
+def split_items(items: Sequence[BatchItem], parts: int) -> List[List[BatchItem]]:
+    """Spread items over `parts` groups of similar total text length"""
+    groups: List[List[BatchItem]] = [[] for _ in range(parts)]
+    sizes = [0] * parts
+    for item in sorted(items, key=lambda item: len(item[1]), reverse=True):
+        smallest = sizes.index(min(sizes))
+        groups[smallest].append(item)
+        sizes[smallest] += len(item[1])
+    return [group for group in groups if group]
+
+
+class BatchExtractor:
+    """Runs /extract-batch: small batches in a thread, large ones across processes.
+
+    Regex scanning holds the GIL, so only separate processes give real
+    parallelism. Batches below `parallel_min_chars` are not worth the
+    pickling and are handled in a thread instead.
+    """
+
+    def __init__(self, workers: int, parallel_min_chars: int):
+        self.workers = workers
+        self.parallel_min_chars = parallel_min_chars
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.batches = 0
+        self.parallel_batches = 0
+        self.items = 0
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def extract(
+        self,
+        items: Sequence[BatchItem],
+        entity_types: Optional[List[str]],
+        gazetteer: Optional[Gazetteer] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return entity dicts per item id, in input order"""
+        self.batches += 1
+        self.items += len(items)
+        total_chars = sum(len(text) for _, text in items)
+
+        if self.workers <= 1 or len(items) < 2 or total_chars < self.parallel_min_chars:
+            results = await asyncio.to_thread(extract_items, items, entity_types, gazetteer)
+        else:
+            self.parallel_batches += 1
+            loop = asyncio.get_running_loop()
+            groups = split_items(items, self.workers)
+            grouped = await asyncio.gather(*[
+                loop.run_in_executor(self.pool, extract_items, group, entity_types, gazetteer)
+                for group in groups
+            ])
+            results = [result for group in grouped for result in group]
+
+        by_id = dict(results)
+        return {item_id: by_id[item_id] for item_id, _ in items}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "parallel_min_chars": self.parallel_min_chars,
+            "pool_started": self._pool is not None,
+            "batches": self.batches,
+            "parallel_batches": self.parallel_batches,
+            "items": self.items,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
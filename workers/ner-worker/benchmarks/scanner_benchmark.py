@@ -0,0 +1,83 @@
+"""Time entity extraction on a generated meeting transcript.
+
+Compares the single-pass scanner with running every pattern separately,
+checks that both find the same spans, and times the whole extraction
+(including date parsing). Run from the worker directory:
+
+    python benchmarks/scanner_benchmark.py [size_in_bytes]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_scanner import ENTITY_PATTERNS, ENTITY_TYPES, get_scanner  # noqa: E402
+from extraction import extract_spans  # noqa: E402
+
+FIRST = ["John", "Mary", "Alice", "Robert", "Priya", "Chen", "Maria", "David", "Sarah", "Ahmed"]
+LAST = ["Smith", "Johnson", "Garcia", "Patel", "Nguyen", "Brown", "Miller", "Davis", "Lopez", "Wilson"]
+INSERTS = [
+    ["Acme Corp", "Globex Inc", "Initech LLC", "Umbrella Ltd", "Wayne Data Systems", "Blue River Solutions"],
+    ["3/14/2024", "2024-05-01", "January 5, 2025", "Feb 12 2024", "next Friday", "last week", "May 3, 2024"],
+    ["$1,250.00", "$40", "300 dollars", "15.5%", "20 percent", "1,000 USD"],
+    ["https://example.com/path/to?x=1", "http://foo.org", "https://docs.acme.io/a/b.html#top"],
+    ["john.smith@acme.com", "sales@globex.io", "m.garcia@example.org"],
+]
+FILLER = "so we talked about the roadmap and i think that the team agreed we should move forward with it and um then".split()
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(FILLER, k=rng.randint(6, 16))
+    kind = rng.randrange(len(INSERTS) + 2)
+    if kind == 0:
+        insert = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+    elif kind == 1:
+        insert = f"{rng.choice(FIRST)} Q. {rng.choice(LAST)}"
+    else:
+        insert = rng.choice(INSERTS[kind - 2])
+    words.insert(rng.randint(0, len(words)), insert)
+    text = " ".join(words)
+    return text[0].upper() + text[1:] + "."
+
+
+def transcript(size: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    length = 0
+    while length < size:
+        sentences.append(sentence(rng))
+        length += len(sentences[-1]) + 1
+    return " ".join(sentences)
+
+
+def best_of(runs: int, fn):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    text = transcript(size)
+    scanner = get_scanner(tuple(ENTITY_TYPES))
+
+    separate_seconds, separate = best_of(3, lambda: [
+        [match.span() for match in re.finditer(p.pattern, text, p.flags)] for p in ENTITY_PATTERNS
+    ])
+    scanner_seconds, scanned = best_of(3, lambda: scanner.scan(text))
+    extract_seconds, entities = best_of(3, lambda: extract_spans(text))
+
+    print(f"text: {len(text):,} chars, {len(entities):,} entities")
+    print(f"pattern by pattern: {separate_seconds:.3f}s")
+    print(f"single-pass scanner: {scanner_seconds:.3f}s (same spans: {scanned == separate})")
+    print(f"extract_spans: {extract_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import re
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Optional
+
+import dateparser
+
+DATE_CACHE_SIZE = 4096
+
+MONTH_NUMBERS = {
+    name: number
+    for number, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+        ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+        ("september", "sep"), ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ], start=1)
+    for name in names
+}
+
+SLASH_DATE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+MONTH_NAME_DATE = re.compile(r'([A-Za-z]+)\s+(\d{1,2}),?\s+(\d{4})')
+
+
+def _make_date(year: int, month: int, day: int) -> Optional[datetime]:
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_explicit_date(value: str) -> Optional[datetime]:
+    """Parse the absolute formats the extractor matches without dateparser.
+
+    Returns None for anything it is not sure about (including impossible
+    dates), leaving those to dateparser so the results do not change.
+    """
+    match = SLASH_DATE.fullmatch(value)
+    if match:
+        first, second, year = (int(group) for group in match.groups())
+        # dateparser reads US month-first order, then day-first if that is impossible
+        return _make_date(year, first, second) or _make_date(year, second, first)
+
+    match = ISO_DATE.fullmatch(value)
+    if match:
+        return _make_date(*(int(group) for group in match.groups()))
+
+    match = MONTH_NAME_DATE.fullmatch(value)
+    if match:
+        month = MONTH_NUMBERS.get(match.group(1).lower())
+        if month is not None:
+            return _make_date(int(match.group(3)), month, int(match.group(2)))
+
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_with_dateparser(phrase: str, reference: date) -> Optional[datetime]:
+    return dateparser.parse(phrase, settings={"RELATIVE_BASE": datetime.combine(reference, time())})
+
+
+def parse_date(value: str, reference: Optional[date] = None) -> Optional[datetime]:
+    """Parse a matched date, falling back to a memoized dateparser call.
+
+    Relative phrases ("next week") resolve against midnight of `reference`
+    (today by default), which is also part of the cache key.
+    """
+    parsed = parse_explicit_date(value)
+    if parsed is not None:
+        return parsed
+    phrase = " ".join(value.lower().split())
+    return _parse_with_dateparser(phrase, reference or date.today())
+
+
+def date_cache_stats():
+    info = _parse_with_dateparser.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+    }
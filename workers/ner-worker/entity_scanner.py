@@ -0,0 +1,143 @@
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# Disjoint classes of the first character of a match. Each scanned position is
+# dispatched to the one class it belongs to, so only patterns that can start
+# there are tried. A pattern's leads must cover every character its first
+# element accepts: \d matches any Unicode digit, and under IGNORECASE [a-z]
+# also matches the four non-ASCII letters in "folded".
+LEAD_CLASSES = {
+    "upper": "[A-Z]",
+    "lower": "[a-z]",
+    "folded": "[\u0130\u0131\u017f\u212a]",
+    "digit": r"\d",
+    "dollar": r"\$",
+    "symbol": "[._%+-]",
+}
+
+
+class EntityPattern(NamedTuple):
+    entity_type: str
+    pattern: str
+    flags: int
+    # LEAD_CLASSES a match can start with
+    leads: Tuple[str, ...]
+    # Character class for patterns not anchored on a word boundary
+    anchor: Optional[str] = None
+
+
+MONTHS = "January|February|March|April|May|June|July|August|September|October|November|December"
+MONTH_ABBREVIATIONS = "Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec"
+RELATIVE_DAYS = "week|month|year|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday"
+
+# In output order: entity type first, then pattern, then position
+ENTITY_PATTERNS = [
+    EntityPattern("person", r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', 0, ("upper",)),  # First Last
+    EntityPattern("person", r'\b[A-Z][a-z]+ [A-Z]\. [A-Z][a-z]+\b', 0, ("upper",)),  # First M. Last
+    EntityPattern("organization", r'\b[A-Z][a-z]+ (?:Inc|Corp|LLC|Ltd|Company|Co)\b', 0, ("upper",)),
+    EntityPattern("organization", r'\b[A-Z][a-z]+ [A-Z][a-z]+ (?:Technologies|Systems|Solutions)\b', 0, ("upper",)),
+    EntityPattern("date", r'\b\d{1,2}/\d{1,2}/\d{4}\b', re.IGNORECASE, ("digit",)),  # MM/DD/YYYY
+    EntityPattern("date", r'\b\d{4}-\d{2}-\d{2}\b', re.IGNORECASE, ("digit",)),  # YYYY-MM-DD
+    EntityPattern("date", rf'\b(?:{MONTHS})\s+\d{{1,2}},?\s+\d{{4}}\b', re.IGNORECASE, ("upper", "lower", "folded")),
+    EntityPattern("date", rf'\b(?:{MONTH_ABBREVIATIONS})\s+\d{{1,2}},?\s+\d{{4}}\b', re.IGNORECASE, ("upper", "lower", "folded")),
+    EntityPattern("date", rf'\b(?:next|last|this)\s+(?:{RELATIVE_DAYS})\b', re.IGNORECASE, ("upper", "lower", "folded")),
+    EntityPattern("amount", r'\$\d+(?:,\d{3})*(?:\.\d{2})?\b', re.IGNORECASE, ("dollar",), anchor=r"\$"),  # $1,234.56
+    EntityPattern("amount", r'\b\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:dollars|USD)\b', re.IGNORECASE, ("digit",)),  # 1,234.56 dollars
+    EntityPattern("amount", r'\b\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:percent|%)\b', re.IGNORECASE, ("digit",)),  # 15.5%
+    EntityPattern(
+        "url",
+        r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?',
+        0,
+        ("lower",),
+        anchor="h",
+    ),
+    EntityPattern(
+        "email",
+        r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+        0,
+        ("upper", "lower", "digit", "symbol"),
+    ),
+]
+
+ENTITY_TYPES = ["person", "organization", "date", "amount", "url", "email"]
+
+# Most whitespace-separated tokens any pattern above can match ("John Q. Smith")
+MAX_MATCH_TOKENS = 3
+
+
+class EntityScanner:
+    """Finds the matches of several patterns in a single pass over the text.
+
+    Every pattern sits in an optional lookahead, so one position can report
+    matches for several overlapping patterns. Per-pattern end offsets then
+    drop matches that a separate `re.finditer` over that pattern would have
+    skipped, which keeps the results identical to scanning pattern by pattern.
+    """
+
+    def __init__(self, patterns: Sequence[EntityPattern]):
+        self.patterns = list(patterns)
+        self.group_patterns: List[int] = []
+
+        branches = []
+        for lead, lead_class in LEAD_CLASSES.items():
+            members = [index for index, entity_pattern in enumerate(self.patterns) if lead in entity_pattern.leads]
+            if not members:
+                continue
+            first_group = len(self.group_patterns)
+            lookaheads = "".join(
+                f"(?:(?=(?P<g{first_group + offset}>{self._inline(self.patterns[index])}))|)"
+                for offset, index in enumerate(members)
+            )
+            # Only report positions where at least one pattern matched
+            matched = "(?!)"
+            for offset in reversed(range(len(members))):
+                matched = f"(?(g{first_group + offset})|{matched})"
+            self.group_patterns.extend(members)
+            branches.append(f"(?={lead_class}){lookaheads}{matched}")
+
+        anchors = "".join(p.anchor for p in self.patterns if p.anchor)
+        start = rf"(?:\b|(?=[{anchors}]))" if anchors else r"\b"
+        self.regex = re.compile(start + "(?:" + "|".join(branches) + ")") if branches else None
+
+    @staticmethod
+    def _inline(entity_pattern: EntityPattern) -> str:
+        if entity_pattern.flags & re.IGNORECASE:
+            return f"(?i:{entity_pattern.pattern})"
+        return entity_pattern.pattern
+
+    def scan(self, text: str, pos: int = 0, last_ends: Optional[Sequence[int]] = None) -> List[List[Tuple[int, int]]]:
+        """Return the (start, end) spans of each pattern, in pattern order.
+
+        Scanning starts at `pos` but still sees the text before it, so word
+        boundaries at `pos` behave as in a full scan. `last_ends` gives the
+        end of each pattern's last match before `pos`, which a later match
+        must not overlap.
+        """
+        spans: List[List[Tuple[int, int]]] = [[] for _ in self.patterns]
+        if self.regex is None:
+            return spans
+
+        last_end = list(last_ends) if last_ends is not None else [0] * len(self.patterns)
+        group_patterns = self.group_patterns
+        for match in self.regex.finditer(text, pos):
+            start = match.start()
+            for group, value in enumerate(match.groups()):
+                if value is None:
+                    continue
+                index = group_patterns[group]
+                if start >= last_end[index]:
+                    end = match.end(group + 1)
+                    last_end[index] = end
+                    spans[index].append((start, end))
+        return spans
+
+
+@lru_cache(maxsize=64)
+def get_scanner(entity_types: Tuple[str, ...]) -> EntityScanner:
+    """Scanner for the patterns of the given entity types, compiled once per set"""
+    return EntityScanner([p for p in ENTITY_PATTERNS if p.entity_type in entity_types])
+
+
+# Compile the default scanner at import rather than on the first request
+get_scanner(tuple(ENTITY_TYPES))
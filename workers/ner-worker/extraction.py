@@ -0,0 +1,144 @@
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from date_parsing import parse_date
+from entity_scanner import ENTITY_TYPES, EntityPattern, EntityScanner, get_scanner
+from gazetteer import Gazetteer
+
+ENTITY_CONFIDENCE = {
+    "person": 0.8,
+    "organization": 0.7,
+    "date": 0.9,
+    "amount": 0.9,
+    "url": 0.95,
+    "email": 0.95,
+}
+
+# Types whose metadata names the entity type instead of repeating the regex
+PATTERN_LABELS = {"url": "url", "email": "email"}
+
+GAZETTEER_CONFIDENCE = 0.95
+
+# Capitalized-word guesses that a dictionary hit on the same text overrides
+GAZETTEER_OVERRIDES = {"person", "organization"}
+
+class Entity(BaseModel):
+    type: str
+    value: str
+    start_position: int
+    end_position: int
+    confidence: float
+    metadata: Optional[Dict[str, Any]] = {}
+
+class EntitySpan:
+    """Compact entity used inside the worker; converted to `Entity` JSON only
+    when a response is written. `label` is the shared metadata pattern string,
+    `parsed_date` the ISO date for date entities and `entry_id` the matched
+    gazetteer entry."""
+    __slots__ = ("type", "value", "start", "end", "confidence", "label", "parsed_date", "entry_id")
+    
+    def __init__(self, type: str, value: str, start: int, end: int, confidence: float, label: Optional[str] = None, parsed_date: Optional[str] = None, entry_id: Optional[str] = None):
+        self.type = type
+        self.value = value
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.label = label
+        self.parsed_date = parsed_date
+        self.entry_id = entry_id
+    
+    def key(self):
+        return (self.type, self.start, self.end, self.value)
+    
+    def metadata(self) -> Dict[str, Any]:
+        if self.parsed_date is not None:
+            return {"parsed_date": self.parsed_date}
+        if self.entry_id is not None:
+            return {"pattern": self.label, "entry_id": self.entry_id}
+        return {"pattern": self.label}
+    
+    def to_dict(self, **extra_metadata) -> Dict[str, Any]:
+        """The `Entity` response shape"""
+        metadata = self.metadata()
+        metadata.update(extra_metadata)
+        return {
+            "type": self.type,
+            "value": self.value,
+            "start_position": self.start,
+            "end_position": self.end,
+            "confidence": self.confidence,
+            "metadata": metadata,
+        }
+
+def scanner_for(entity_types: Optional[List[str]]) -> EntityScanner:
+    """The shared scanner for the patterns of the requested entity types"""
+    if entity_types is None:
+        entity_types = ENTITY_TYPES
+    return get_scanner(tuple(t for t in ENTITY_TYPES if t in entity_types))
+
+def extract_spans(text: str, entity_types: Optional[List[str]] = None, start_position: int = 0, gazetteer: Optional[Gazetteer] = None) -> List[EntitySpan]:
+    """Extract named entities from text, optionally only those starting at or after `start_position`"""
+    # One pass over the text finds the matches of every requested pattern
+    scanner = scanner_for(entity_types)
+    entities = spans_from_matches(text, scanner.patterns, scanner.scan(text, start_position))
+    
+    if gazetteer is not None:
+        entities = merge_gazetteer_hits(entities, text, entity_types, start_position, gazetteer)
+    
+    return entities
+
+def spans_from_matches(text: str, patterns: List[EntityPattern], matches: List[List[Tuple[int, int]]]) -> List[EntitySpan]:
+    """Entities for each pattern's (start, end) matches; dates that do not parse are dropped"""
+    entities = []
+    append = entities.append
+    for entity_pattern, spans in zip(patterns, matches):
+        entity_type = entity_pattern.entity_type
+        
+        if entity_type == "date":
+            for start, end in spans:
+                value = text[start:end]
+                try:
+                    parsed_date = parse_date(value)
+                    if parsed_date:
+                        append(EntitySpan("date", value, start, end, 0.9, parsed_date=parsed_date.isoformat()))
+                except:
+                    pass
+            continue
+        
+        confidence = ENTITY_CONFIDENCE[entity_type]
+        label = PATTERN_LABELS.get(entity_type, entity_pattern.pattern)
+        for start, end in spans:
+            append(EntitySpan(entity_type, text[start:end], start, end, confidence, label))
+    return entities
+
+def merge_gazetteer_hits(entities: List[EntitySpan], text: str, entity_types: Optional[List[str]], start_position: int, gazetteer: Gazetteer) -> List[EntitySpan]:
+    """Add dictionary hits, dropping person/organization guesses that overlap one.
+
+    Gazetteer entries may use their own types (e.g. "project"); with no
+    entity_types filter every hit is returned.
+    """
+    hits = [
+        EntitySpan(entry.type, text[start:end], start, end, GAZETTEER_CONFIDENCE, "gazetteer", entry_id=entry.id)
+        for start, end, entry in gazetteer.find(text, start_position)
+        if entity_types is None or entry.type in entity_types
+    ]
+    if not hits:
+        return entities
+    
+    # Hits do not overlap each other, so the last one starting before an
+    # entity's end is the only one that can overlap it
+    hit_starts = [hit.start for hit in hits]
+    kept = []
+    for entity in entities:
+        if entity.type in GAZETTEER_OVERRIDES:
+            index = bisect.bisect_left(hit_starts, entity.end) - 1
+            if index >= 0 and hits[index].end > entity.start:
+                continue
+        kept.append(entity)
+    return kept + hits
+
+def extract_entities_from_text(text: str, entity_types: Optional[List[str]] = None, start_position: int = 0, gazetteer: Optional[Gazetteer] = None) -> List[Entity]:
+    """Extract named entities as `Entity` models"""
+    return [Entity(**span.to_dict()) for span in extract_spans(text, entity_types, start_position, gazetteer)]
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Words, plus single punctuation marks so "AT&T" and "J.P." must match exactly
+TOKEN = re.compile(r"\w+|[^\w\s]")
+# Prefix of a token that follows whitespace rather than touching the previous
+# token, so "AT & T" does not match "AT&T". Tokens never contain whitespace.
+SPACED = " "
+
+
+class GazetteerEntry(NamedTuple):
+    text: str
+    type: str
+    id: Optional[str] = None
+
+
+def tokenize(text: str) -> List[str]:
+    """Casefolded tokens; every token after the first records whether it
+    touches the one before it"""
+    tokens = []
+    previous_end = None
+    for match in TOKEN.finditer(text):
+        token = match.group().casefold()
+        if previous_end is not None and match.start() != previous_end:
+            token = SPACED + token
+        tokens.append(token)
+        previous_end = match.end()
+    return tokens
+
+
+class Gazetteer:
+    """Token-level Aho-Corasick automaton over an organization's names.
+
+    Matching is case-insensitive and whole-word, and finds every entry in
+    one pass over the text regardless of how many entries there are. Tokens
+    must be spaced as in the entry: "AT&T" does not match "AT & T". The first
+    token of an entry matches whatever precedes it, so the root's edges are
+    keyed by the bare token.
+    """
+
+    def __init__(self, entries: List[GazetteerEntry]):
+        self.entries = entries
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # (entry index, length in tokens) for every entry ending at a node
+        self.outputs: List[List[Tuple[int, int]]] = [[]]
+
+        for index, entry in enumerate(entries):
+            tokens = tokenize(entry.text)
+            if not tokens:
+                continue
+            node = 0
+            tokens[0] = tokens[0].lstrip(SPACED)
+            for token in tokens:
+                child = self.goto[node].get(token)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][token] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                node = child
+            self.outputs[node].append((index, len(tokens)))
+
+        # Breadth-first failure links; each node also reports its suffixes' entries
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token if fallback else token.lstrip(SPACED), 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def find(self, text: str, start_position: int = 0) -> List[Tuple[int, int, GazetteerEntry]]:
+        """Leftmost-longest, non-overlapping (start, end, entry) hits"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        starts: List[int] = []
+        hits = []
+        state = 0
+        previous_end = None
+        for match in TOKEN.finditer(text, start_position):
+            bare = match.group().casefold()
+            token = bare if match.start() == previous_end else SPACED + bare
+            starts.append(match.start())
+            previous_end = match.end()
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token if state else bare, 0)
+            for index, length in outputs[state]:
+                hits.append((starts[len(starts) - length], match.end(), index))
+
+        selected = []
+        last_end = -1
+        for start, end, index in sorted(hits, key=lambda hit: (hit[0], -hit[1])):
+            if start >= last_end:
+                selected.append((start, end, self.entries[index]))
+                last_end = end
+        return selected
+
+
+def fingerprint(entries: List[GazetteerEntry]) -> str:
+    # Entries without an id must sort next to ones with one
+    ordered = sorted(entries, key=lambda entry: (entry.text, entry.type, entry.id or ""))
+    payload = json.dumps(ordered, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class GazetteerStore:
+    """Per-organization entry lists with lazily built, LRU-cached automata.
+
+    Replacing an organization's list invalidates its automaton only when the
+    entries actually changed; it is rebuilt on the next lookup.
+    """
+
+    def __init__(self, max_cached: int):
+        self.max_cached = max_cached
+        self.entries: Dict[str, Tuple[str, List[GazetteerEntry]]] = {}
+        self.automata: "OrderedDict[str, Tuple[str, Gazetteer]]" = OrderedDict()
+        self.hits = 0
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def set_entries(self, organization_id: str, entries: List[GazetteerEntry]) -> Dict[str, Any]:
+        version = fingerprint(entries)
+        current = self.entries.get(organization_id)
+        changed = current is None or current[0] != version
+        if changed:
+            self.entries[organization_id] = (version, entries)
+            self.automata.pop(organization_id, None)
+        return {"organization_id": organization_id, "version": version, "entries": len(entries), "changed": changed}
+
+    def remove(self, organization_id: str) -> bool:
+        self.automata.pop(organization_id, None)
+        return self.entries.pop(organization_id, None) is not None
+
+    def get(self, organization_id: str) -> Optional[Gazetteer]:
+        current = self.entries.get(organization_id)
+        if current is None:
+            return None
+        version, entries = current
+
+        cached = self.automata.get(organization_id)
+        if cached is not None and cached[0] == version:
+            self.automata.move_to_end(organization_id)
+            self.hits += 1
+            return cached[1]
+
+        started = time.perf_counter()
+        gazetteer = Gazetteer(entries)
+        self.build_seconds += time.perf_counter() - started
+        self.builds += 1
+        self.automata[organization_id] = (version, gazetteer)
+        while len(self.automata) > self.max_cached:
+            self.automata.popitem(last=False)
+        return gazetteer
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "organizations": len(self.entries),
+            "cached_automata": len(self.automata),
+            "max_cached": self.max_cached,
+            "hits": self.hits,
+            "builds": self.builds,
+            "build_seconds": round(self.build_seconds, 3),
+        }
@@ -1,16 +1,37 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional
 import uvicorn
 import os
 from dotenv import load_dotenv
 import re
-import dateparser
-from datetime import datetime
+
+from batch_extraction import BatchExtractor
+from date_parsing import date_cache_stats, parse_date
+from extraction import Entity, EntitySpan, extract_spans
+from gazetteer import GazetteerEntry, GazetteerStore
+from sessions import SessionStore
 
 load_dotenv()
 
+# Large /extract-batch requests are spread over a process pool
+batch_extractor = BatchExtractor(
+    workers=int(os.getenv("NER_BATCH_WORKERS", os.cpu_count() or 1)),
+    parallel_min_chars=int(os.getenv("NER_BATCH_PARALLEL_MIN_CHARS", 200_000)),
+)
+
+# Per-organization name dictionaries, compiled on first use after each change
+gazetteer_store = GazetteerStore(max_cached=int(os.getenv("NER_GAZETTEER_CACHE_SIZE", 64)))
+
+# Live transcripts: each append rescans only the new text plus an overlap window
+session_store = SessionStore(
+    overlap_chars=int(os.getenv("NER_SESSION_OVERLAP_CHARS", 256)),
+    ttl_seconds=float(os.getenv("NER_SESSION_TTL_SECONDS", 3600)),
+    max_sessions=int(os.getenv("NER_MAX_SESSIONS", 1000)),
+)
+
 app = FastAPI(title="NER Worker", version="1.0.0")
 
 # CORS middleware
@@ -25,174 +46,197 @@ app.add_middleware(
 class NERRequest(BaseModel):
     text: str
     entity_types: Optional[List[str]] = None
+    organization_id: Optional[str] = None
 
-class Entity(BaseModel):
-    type: str
-    value: str
-    start_position: int
-    end_position: int
+class NERResponse(BaseModel):
+    entities: List[Entity]
     confidence: float
-    metadata: Optional[Dict[str, Any]] = {}
 
-class NERResponse(BaseModel):
+class SessionAppendRequest(BaseModel):
+    text: str
+    entity_types: Optional[List[str]] = None
+
+class SessionDeltaResponse(BaseModel):
+    session_id: str
+    text_length: int
+    added: List[Entity]
+    retracted: List[Entity]
+
+class NERBatchItem(BaseModel):
+    id: str
+    text: str
+
+class NERBatchRequest(BaseModel):
+    items: List[NERBatchItem]
+    entity_types: Optional[List[str]] = None
+    organization_id: Optional[str] = None
+
+class GazetteerEntryModel(BaseModel):
+    text: str
+    type: str
+    id: Optional[str] = None
+
+class GazetteerRequest(BaseModel):
+    entries: List[GazetteerEntryModel]
+
+class NERBatchResult(BaseModel):
+    id: str
     entities: List[Entity]
+
+class NERBatchResponse(BaseModel):
+    results: List[NERBatchResult]
     confidence: float
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "ner-worker"}
 
+# Responses are built from EntitySpan dicts and encoded with orjson directly;
+# the response models above only document the schema
 @app.post("/extract", response_model=NERResponse)
 async def extract_entities(request: NERRequest):
     try:
-        entities = extract_entities_from_text(request.text, request.entity_types)
-        
-        return NERResponse(
-            entities=entities,
-            confidence=0.85
+        spans = extract_spans(
+            request.text,
+            request.entity_types,
+            gazetteer=get_gazetteer(request.organization_id)
         )
         
+        return ORJSONResponse({
+            "entities": [span.to_dict() for span in spans],
+            "confidence": 0.85
+        })
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def extract_entities_from_text(text: str, entity_types: Optional[List[str]] = None) -> List[Entity]:
-    """Extract named entities from text"""
-    entities = []
-    
-    if entity_types is None:
-        entity_types = ["person", "organization", "date", "amount", "url", "email"]
-    
-    # Extract people (simple pattern matching)
-    if "person" in entity_types:
-        person_patterns = [
-            r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',  # First Last
-            r'\b[A-Z][a-z]+ [A-Z]\. [A-Z][a-z]+\b',  # First M. Last
-        ]
-        for pattern in person_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append(Entity(
-                    type="person",
-                    value=match.group(),
-                    start_position=match.start(),
-                    end_position=match.end(),
-                    confidence=0.8,
-                    metadata={"pattern": pattern}
-                ))
-    
-    # Extract organizations
-    if "organization" in entity_types:
-        org_patterns = [
-            r'\b[A-Z][a-z]+ (?:Inc|Corp|LLC|Ltd|Company|Co)\b',
-            r'\b[A-Z][a-z]+ [A-Z][a-z]+ (?:Technologies|Systems|Solutions)\b',
-        ]
-        for pattern in org_patterns:
-            for match in re.finditer(pattern, text):
-                entities.append(Entity(
-                    type="organization",
-                    value=match.group(),
-                    start_position=match.start(),
-                    end_position=match.end(),
-                    confidence=0.7,
-                    metadata={"pattern": pattern}
-                ))
-    
-    # Extract dates
-    if "date" in entity_types:
-        date_patterns = [
-            r'\b\d{1,2}/\d{1,2}/\d{4}\b',  # MM/DD/YYYY
-            r'\b\d{4}-\d{2}-\d{2}\b',  # YYYY-MM-DD
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s+\d{4}\b',
-            r'\b(?:next|last|this)\s+(?:week|month|year|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\b',
-        ]
-        for pattern in date_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                try:
-                    parsed_date = dateparser.parse(match.group())
-                    if parsed_date:
-                        entities.append(Entity(
-                            type="date",
-                            value=match.group(),
-                            start_position=match.start(),
-                            end_position=match.end(),
-                            confidence=0.9,
-                            metadata={"parsed_date": parsed_date.isoformat()}
-                        ))
-                except:
-                    pass
+@app.post("/extract-batch", response_model=NERBatchResponse)
+async def extract_entities_batch(request: NERBatchRequest):
+    """Extract entities from many texts in one call; offsets are relative to each text"""
+    ids = [item.id for item in request.items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Item ids must be unique")
     
-    # Extract amounts/money
-    if "amount" in entity_types:
-        amount_patterns = [
-            r'\$\d+(?:,\d{3})*(?:\.\d{2})?\b',  # $1,234.56
-            r'\b\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:dollars|USD)\b',  # 1,234.56 dollars
-            r'\b\d+(?:,\d{3})*(?:\.\d{2})?\s*(?:percent|%)\b',  # 15.5%
-        ]
-        for pattern in amount_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                entities.append(Entity(
-                    type="amount",
-                    value=match.group(),
-                    start_position=match.start(),
-                    end_position=match.end(),
-                    confidence=0.9,
-                    metadata={"pattern": pattern}
-                ))
-    
-    # Extract URLs
-    if "url" in entity_types:
-        url_pattern = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?'
-        for match in re.finditer(url_pattern, text):
-            entities.append(Entity(
-                type="url",
-                value=match.group(),
-                start_position=match.start(),
-                end_position=match.end(),
-                confidence=0.95,
-                metadata={"pattern": "url"}
-            ))
-    
-    # Extract emails
-    if "email" in entity_types:
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        for match in re.finditer(email_pattern, text):
-            entities.append(Entity(
-                type="email",
-                value=match.group(),
-                start_position=match.start(),
-                end_position=match.end(),
-                confidence=0.95,
-                metadata={"pattern": "email"}
-            ))
-    
-    return entities
+    try:
+        results = await batch_extractor.extract(
+            [(item.id, item.text) for item in request.items],
+            request.entity_types,
+            get_gazetteer(request.organization_id)
+        )
+        
+        return ORJSONResponse({
+            "results": [{"id": item_id, "entities": entities} for item_id, entities in results.items()],
+            "confidence": 0.85
+        })
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/extract-batch/stats")
+async def extract_batch_stats():
+    """Batch sizes and how often the process pool was used"""
+    return batch_extractor.stats()
+
+@app.post("/sessions/{session_id}/append", response_model=SessionDeltaResponse)
+async def append_to_session(session_id: str, request: SessionAppendRequest):
+    """Append transcript text to a live session and return entity deltas.
+
+    Offsets are absolute positions in the session's full transcript.
+    entity_types is fixed by the first append of a session.
+    """
+    try:
+        session = session_store.get_or_create(session_id, request.entity_types)
+        delta = session.append(request.text)
+        
+        return ORJSONResponse({
+            **delta,
+            "added": [span.to_dict() for span in delta["added"]],
+            "retracted": [span.to_dict() for span in delta["retracted"]]
+        })
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/sessions/{session_id}/entities", response_model=NERResponse)
+async def get_session_entities(session_id: str):
+    """All current entities of a live session"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return ORJSONResponse({
+        "entities": [span.to_dict() for span in session.entities],
+        "confidence": 0.85
+    })
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    if not session_store.remove(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return {"session_id": session_id, "ended": True}
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Live session count and expiry"""
+    return session_store.stats()
+
+def get_gazetteer(organization_id: Optional[str]):
+    return gazetteer_store.get(organization_id) if organization_id else None
+
+@app.put("/gazetteers/{organization_id}")
+async def set_gazetteer(organization_id: str, request: GazetteerRequest):
+    """Replace an organization's dictionary of people, customers, projects, etc.
+
+    Matching uses the new list from the next request on; resending an
+    unchanged list keeps the compiled automaton.
+    """
+    entries = [GazetteerEntry(entry.text, entry.type, entry.id) for entry in request.entries]
+    return gazetteer_store.set_entries(organization_id, entries)
+
+@app.delete("/gazetteers/{organization_id}")
+async def delete_gazetteer(organization_id: str):
+    if not gazetteer_store.remove(organization_id):
+        raise HTTPException(status_code=404, detail=f"No gazetteer for organization: {organization_id}")
+    return {"organization_id": organization_id, "deleted": True}
+
+@app.get("/gazetteers/stats")
+async def gazetteer_stats():
+    """Dictionary count and automaton cache behaviour"""
+    return gazetteer_store.stats()
+
+@app.on_event("shutdown")
+async def shutdown():
+    batch_extractor.shutdown()
 
 @app.post("/validate")
 async def validate_entities(request: NERRequest):
     """Validate extracted entities"""
     try:
-        entities = extract_entities_from_text(request.text, request.entity_types)
+        spans = extract_spans(
+            request.text,
+            request.entity_types,
+            gazetteer=get_gazetteer(request.organization_id)
+        )
         validated_entities = []
+        valid_count = 0
         
-        for entity in entities:
-            # Add validation logic here
-            is_valid = validate_entity(entity)
-            entity.metadata["valid"] = is_valid
-            validated_entities.append(entity)
+        for span in spans:
+            is_valid = validate_entity(span)
+            valid_count += is_valid
+            validated_entities.append(span.to_dict(valid=is_valid))
         
-        return {
+        return ORJSONResponse({
             "entities": validated_entities,
             "validation_summary": {
                 "total": len(validated_entities),
-                "valid": len([e for e in validated_entities if e.metadata.get("valid", False)]),
-                "invalid": len([e for e in validated_entities if not e.metadata.get("valid", False)])
+                "valid": valid_count,
+                "invalid": len(validated_entities) - valid_count
             }
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def validate_entity(entity: Entity) -> bool:
+def validate_entity(entity: EntitySpan) -> bool:
     """Validate a single entity"""
     if entity.type == "email":
         # Basic email validation
@@ -203,10 +247,11 @@ def validate_entity(entity: Entity) -> bool:
         return entity.value.startswith(('http://', 'https://'))
     
     elif entity.type == "date":
-        # Date validation
+        # Extraction already parsed the date; only parse values from elsewhere
+        if entity.parsed_date is not None:
+            return True
         try:
-            parsed = dateparser.parse(entity.value)
-            return parsed is not None
+            return parse_date(entity.value) is not None
         except:
             return False
     
@@ -217,6 +262,11 @@ def validate_entity(entity: Entity) -> bool:
     # Default to valid for other types
     return True
 
+@app.get("/dates/cache/stats")
+async def date_parser_cache_stats():
+    """Hit rate of the memoized dateparser fallback"""
+    return date_cache_stats()
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8004))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,154 @@
+import bisect
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from entity_scanner import MAX_MATCH_TOKENS
+from extraction import EntitySpan, scanner_for, spans_from_matches
+
+
+def token_start(text: str, count: int) -> int:
+    """Start of the `count`-th whitespace-separated token from the end"""
+    pos = len(text)
+    for _ in range(count):
+        while pos > 0 and text[pos - 1].isspace():
+            pos -= 1
+        while pos > 0 and not text[pos - 1].isspace():
+            pos -= 1
+    return pos
+
+
+class NERSession:
+    """Entities of a transcript that grows by appending text.
+
+    Each append only rescans the new text plus `overlap_chars` before it,
+    since appended text can extend or break an entity at the old end
+    ("Acme Co" + "rp"). The window always covers the last MAX_MATCH_TOKENS
+    tokens, where a match reaching into the new text could begin, and
+    starts before every raw pattern match that ends inside it, so those are
+    re-evaluated as a whole. Applying the deltas of every append gives the
+    same entities as one extraction over the full text.
+    """
+
+    def __init__(self, session_id: str, entity_types: Optional[List[str]], overlap_chars: int):
+        self.session_id = session_id
+        self.entity_types = entity_types
+        self.overlap_chars = overlap_chars
+        self.scanner = scanner_for(entity_types)
+        self.text = ""
+        self.entities: List[EntitySpan] = []
+        # Raw (start, end) matches per pattern, including dates that did not parse
+        self.matches: List[List[Tuple[int, int]]] = [[] for _ in self.scanner.patterns]
+        self.longest_match = 0
+        self.appends = 0
+        self.scanned_chars = 0
+        self.last_used = time.monotonic()
+
+    def window_start(self) -> int:
+        start = min(max(0, len(self.text) - self.overlap_chars), token_start(self.text, MAX_MATCH_TOKENS))
+        # Widening can land inside a token and snapping can reach another
+        # match, so repeat both until the start stops moving
+        while True:
+            widened = start
+            for spans in self.matches:
+                # Matches are sorted by start; earlier ones cannot reach the window
+                for match_start, match_end in reversed(spans):
+                    if match_start + self.longest_match < widened:
+                        break
+                    if match_end >= widened:
+                        widened = min(widened, match_start)
+            # Never start inside a token, where a shorter match could begin
+            while widened > 0 and not self.text[widened - 1].isspace():
+                widened -= 1
+            if widened == start:
+                return start
+            start = widened
+
+    def append(self, text: str) -> Dict[str, Any]:
+        """Add text and return the spans added and retracted by it"""
+        start = self.window_start()
+        self.text += text
+        self.appends += 1
+        self.scanned_chars += len(self.text) - start
+
+        kept_matches = [spans[:bisect.bisect_left(spans, (start, -1))] for spans in self.matches]
+        # Each pattern's matches do not overlap, so its last kept match ends last
+        last_ends = [spans[-1][1] if spans else 0 for spans in kept_matches]
+        new_matches = self.scanner.scan(self.text, start, last_ends)
+        self.matches = [kept + new for kept, new in zip(kept_matches, new_matches)]
+        for spans in new_matches:
+            for match_start, match_end in spans:
+                self.longest_match = max(self.longest_match, match_end - match_start)
+
+        rescanned = spans_from_matches(self.text, self.scanner.patterns, new_matches)
+        kept = [entity for entity in self.entities if entity.start < start]
+        previous = {entity.key(): entity for entity in self.entities if entity.start >= start}
+        current = {entity.key(): entity for entity in rescanned}
+
+        self.entities = kept + sorted(rescanned, key=lambda entity: (entity.start, entity.end))
+        return {
+            "session_id": self.session_id,
+            "text_length": len(self.text),
+            "added": [entity for key, entity in current.items() if key not in previous],
+            "retracted": [entity for key, entity in previous.items() if key not in current],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "text_length": len(self.text),
+            "entities": len(self.entities),
+            "appends": self.appends,
+            "scanned_chars": self.scanned_chars,
+        }
+
+
+class SessionStore:
+    """Live NER sessions, dropped after `ttl_seconds` without an append"""
+
+    def __init__(self, overlap_chars: int, ttl_seconds: float, max_sessions: int):
+        self.overlap_chars = overlap_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, NERSession]" = OrderedDict()
+        self.expired = 0
+
+    def get(self, session_id: str) -> Optional[NERSession]:
+        self.expire()
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str, entity_types: Optional[List[str]]) -> NERSession:
+        session = self.get(session_id)
+        if session is None:
+            session = NERSession(session_id, entity_types, self.overlap_chars)
+            self.sessions[session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.expired += 1
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+    def expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Least recently used first, so stop at the first live session
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_used > cutoff:
+                break
+            self.sessions.popitem(last=False)
+            self.expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self.expire()
+        return {
+            "sessions": len(self.sessions),
+            "expired": self.expired,
+            "overlap_chars": self.overlap_chars,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,33 @@
+import random
+import re
+
+import pytest
+
+from entity_scanner import ENTITY_PATTERNS, ENTITY_TYPES, get_scanner
+
+PIECES = [
+    "John Smith", "John Q. Smith", "Acme Corp", "Blue River Solutions", "May 5, 2024", "ſep 5, 2024",
+    "next Friday", "$1,000.00", "12%", "15 percent", "300 dollars", "http://a.b/c?d=1#e", "x@y.com",
+    "3/4/2024", "2024-01-02", "١٢/٣/٢٠٢٤", "٢٠٢٤-٠١-٠٢", "٣٠٠ dollars", "٥٠ %", "１２ percent",
+]
+ALPHABET = "aAbZz09 .$@/-:,%hJjMmnN Q.\n٣"
+
+
+def per_pattern(text, patterns):
+    return [[match.span() for match in re.finditer(p.pattern, text, p.flags)] for p in patterns]
+
+
+@pytest.mark.parametrize("text", ["Due ١٢/٣/٢٠٢٤ and ٢٠٢٤-٠١-٠٢", "٣٠٠ dollars, ٥٠ % and １２ percent", "ſep 5, 2024"])
+def test_non_ascii_leads_match(text):
+    scanner = get_scanner(tuple(ENTITY_TYPES))
+    spans = scanner.scan(text)
+    assert spans == per_pattern(text, ENTITY_PATTERNS)
+    assert any(spans)
+
+
+def test_matches_pattern_by_pattern():
+    random.seed(3)
+    scanner = get_scanner(tuple(ENTITY_TYPES))
+    for _ in range(2000):
+        text = "".join(random.choice(PIECES) if random.random() < 0.3 else random.choice(ALPHABET) for _ in range(40))
+        assert scanner.scan(text) == per_pattern(text, ENTITY_PATTERNS), text
@@ -0,0 +1,34 @@
+from gazetteer import Gazetteer, GazetteerEntry, fingerprint
+
+
+def found(gazetteer, text):
+    return [(text[start:end], entry.text) for start, end, entry in gazetteer.find(text)]
+
+
+def test_fingerprint_mixes_entries_with_and_without_ids():
+    entries = [GazetteerEntry("Acme", "ORG", "org-1"), GazetteerEntry("Acme", "ORG")]
+    assert fingerprint(entries) == fingerprint(list(reversed(entries)))
+
+
+def test_punctuated_names_match_only_with_the_same_spacing():
+    gazetteer = Gazetteer([GazetteerEntry("AT&T", "ORG"), GazetteerEntry("J.P. Morgan", "ORG")])
+    assert found(gazetteer, "Call at&t about it") == [("at&t", "AT&T")]
+    assert found(gazetteer, "Call AT & T about it") == []
+    assert found(gazetteer, "Met J. P. Morgan and J.P. Morgan") == [("J.P. Morgan", "J.P. Morgan")]
+
+
+def test_first_token_matches_after_any_separator():
+    gazetteer = Gazetteer([GazetteerEntry("Blue River", "ORG"), GazetteerEntry("River Co", "ORG")])
+    assert found(gazetteer, "(Blue River) and x.River Co") == [
+        ("Blue River", "Blue River"),
+        ("River Co", "River Co"),
+    ]
+
+
+def test_failure_links_keep_spacing():
+    # After "a b" fails on "&", the automaton falls back to "b" and must
+    # still require "&" to touch it
+    gazetteer = Gazetteer([GazetteerEntry("a b c", "ORG"), GazetteerEntry("b&d", "ORG"), GazetteerEntry("b & e", "ORG")])
+    assert found(gazetteer, "a b&d") == [("b&d", "b&d")]
+    assert found(gazetteer, "a b & d") == []
+    assert found(gazetteer, "a b & e") == [("b & e", "b & e")]
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from extraction import extract_spans
+from sessions import NERSession
+
+WORDS = (
+    "John Tech Tech on Co Bar Systems May Smith Q. 5, 2025 January Jan 12 $1,000 1,000 dollars "
+    "% percent next week user@example.com https://example.com/a/b Corp Inc 3/14/2024 2024-05-01 "
+    "Blue River Solutions so we agreed to move forward with the plan"
+).split()
+SEPARATORS = [" ", " ", " ", "  ", "", ",", ".", "\n"]
+
+
+def replay(chunks, overlap_chars):
+    """Apply every append's deltas and return the resulting entity keys"""
+    session = NERSession("test", None, overlap_chars)
+    entities = {}
+    for chunk in chunks:
+        delta = session.append(chunk)
+        for entity in delta["retracted"]:
+            del entities[entity.key()]
+        for entity in delta["added"]:
+            entities[entity.key()] = entity
+    return set(entities)
+
+
+def full_extraction(text):
+    return {entity.key() for entity in extract_spans(text)}
+
+
+@pytest.mark.parametrize("chunks, overlap_chars", [
+    # An entity kept before the window must still block overlapping matches
+    (["John Tech Tech on", " Co Bar John Systems Tech May Smith"], 8),
+    # A match can start in text that was appended earlier
+    (["Bar ", "May Smith"], 0),
+    (["Acme Co", "rp signed"], 256),
+])
+def test_replay_examples(chunks, overlap_chars):
+    assert replay(chunks, overlap_chars) == full_extraction("".join(chunks))
+
+
+@pytest.mark.parametrize("overlap_chars", [0, 8, 256])
+def test_replay_matches_full_extraction(overlap_chars):
+    rng = random.Random(overlap_chars)
+    for _ in range(100):
+        text = "".join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(rng.randint(5, 150)))
+        chunks = []
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 40)
+            chunks.append(text[position:position + size])
+            position += size
+        assert replay(chunks, overlap_chars) == full_extraction(text), text
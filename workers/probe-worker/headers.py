@@ -0,0 +1,295 @@
+"""Pure-Python header parsing for common audio containers.
+
+Reads the same fields ffprobe reports for WAV, FLAC, Ogg (Vorbis, Opus,
+FLAC) and MP3 from the first and last few KB of a file. Every parser
+returns None when the container is unknown or the header looks damaged,
+so callers can fall back to ffprobe.
+"""
+import struct
+from typing import Any, Dict, Optional
+
+# Enough for the container header in all supported formats
+HEAD_BYTES = 64 * 1024
+# Ogg stores the final granule position in the last page
+TAIL_BYTES = 64 * 1024
+
+WAV_CODECS = {
+    0x0001: None,  # PCM, name depends on bit depth
+    0x0003: "float",
+    0x0006: "pcm_alaw",
+    0x0007: "pcm_mulaw",
+}
+
+MP3_BITRATES = {
+    # (mpeg1, layer3) and (mpeg2/2.5, layer3) bitrate tables in kbps
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+
+
+def _result(duration: float, sample_rate: int, channels: int, codec: str, file_size: int) -> Optional[Dict[str, Any]]:
+    if duration <= 0 or sample_rate <= 0 or channels <= 0:
+        return None
+    return {
+        "duration": duration,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "format": codec,
+        # ffprobe reports the container bit rate as total size over duration
+        "bit_rate": int(file_size * 8 / duration),
+        "valid": True,
+    }
+
+
+def id3v2_size(head: bytes) -> int:
+    """Length of a leading ID3v2 tag, including its header and footer"""
+    if len(head) < 10 or head[:3] != b"ID3":
+        return 0
+    flags = head[5]
+    size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    return 10 + size + (10 if flags & 0x10 else 0)
+
+
+def parse_wav(head: bytes, file_size: int) -> Optional[Dict[str, Any]]:
+    if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    position = 12
+    while position + 8 <= len(head):
+        chunk_id = head[position:position + 4]
+        chunk_size = struct.unpack_from("<I", head, position + 4)[0]
+        body = position + 8
+
+        if chunk_id == b"fmt ":
+            if body + 16 > len(head):
+                return None
+            fmt = struct.unpack_from("<HHIIHH", head, body)
+            if fmt[0] == 0xFFFE and chunk_size >= 40 and body + 26 <= len(head):
+                # WAVE_FORMAT_EXTENSIBLE: the real format is the subformat GUID prefix
+                subformat = struct.unpack_from("<H", head, body + 24)[0]
+                fmt = (subformat,) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, sample_rate, _, block_align, bits = fmt
+            if audio_format not in WAV_CODECS or block_align == 0:
+                return None
+
+            codec = WAV_CODECS[audio_format]
+            if audio_format == 0x0001:
+                codec = "pcm_u8" if bits == 8 else f"pcm_s{bits}le"
+            elif codec == "float":
+                codec = f"pcm_f{bits}le"
+
+            data_size = min(chunk_size, file_size - body)
+            duration = data_size / (block_align * sample_rate) if sample_rate else 0
+            return _result(duration, sample_rate, channels, codec, file_size)
+
+        position = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _flac_streaminfo(block: bytes):
+    """Return (sample_rate, channels, total_samples) from a STREAMINFO block"""
+    if len(block) < 18:
+        return None
+    packed = int.from_bytes(block[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    return sample_rate, channels, total_samples
+
+
+def parse_flac(head: bytes, file_size: int) -> Optional[Dict[str, Any]]:
+    offset = id3v2_size(head)
+    if head[offset:offset + 4] != b"fLaC" or len(head) < offset + 8 + 34:
+        return None
+    block_type = head[offset + 4] & 0x7F
+    if block_type != 0:
+        return None
+    info = _flac_streaminfo(head[offset + 8:offset + 8 + 34])
+    if info is None:
+        return None
+    sample_rate, channels, total_samples = info
+    if not sample_rate or not total_samples:
+        return None
+    return _result(total_samples / sample_rate, sample_rate, channels, "flac", file_size)
+
+
+def _ogg_first_packet(head: bytes):
+    """Return (serial, first packet bytes) of the first Ogg page"""
+    if len(head) < 27 or head[:4] != b"OggS":
+        return None
+    serial = struct.unpack_from("<I", head, 14)[0]
+    segments = head[26]
+    table = head[27:27 + segments]
+    body = 27 + segments
+    length = 0
+    for lacing in table:
+        length += lacing
+        if lacing < 255:
+            break
+    return serial, head[body:body + length]
+
+
+def _ogg_last_granule(tail: bytes, serial: int) -> Optional[int]:
+    position = tail.rfind(b"OggS")
+    while position >= 0:
+        if position + 27 <= len(tail) and tail[position + 4] == 0:
+            granule = struct.unpack_from("<q", tail, position + 6)[0]
+            page_serial = struct.unpack_from("<I", tail, position + 14)[0]
+            if page_serial == serial and granule >= 0:
+                return granule
+        position = tail.rfind(b"OggS", 0, position)
+    return None
+
+
+def parse_ogg(head: bytes, tail: bytes, file_size: int) -> Optional[Dict[str, Any]]:
+    first = _ogg_first_packet(head)
+    if first is None:
+        return None
+    serial, packet = first
+    granule = _ogg_last_granule(tail, serial)
+    if granule is None:
+        return None
+
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 16:
+        channels = packet[11]
+        sample_rate = struct.unpack_from("<I", packet, 12)[0]
+        if not sample_rate:
+            return None
+        return _result(granule / sample_rate, sample_rate, channels, "vorbis", file_size)
+
+    if packet[:8] == b"OpusHead" and len(packet) >= 19:
+        channels = packet[9]
+        # Opus always decodes at 48 kHz regardless of the input rate field.
+        # ffprobe counts the pre-skip as a negative start time, so the
+        # reported duration is the whole granule range.
+        return _result(granule / 48000, 48000, channels, "opus", file_size)
+
+    if packet[:5] == b"\x7fFLAC" and packet[9:13] == b"fLaC" and len(packet) >= 13 + 4 + 34:
+        info = _flac_streaminfo(packet[17:17 + 34])
+        if info is None or not info[0]:
+            return None
+        sample_rate, channels, _ = info
+        return _result(granule / sample_rate, sample_rate, channels, "flac", file_size)
+
+    return None
+
+
+def _mp3_frame(head: bytes, position: int):
+    """Decode an MPEG audio layer III frame header at `position`"""
+    if position + 4 > len(head):
+        return None
+    header = struct.unpack_from(">I", head, position)[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    padding = (header >> 9) & 0x1
+    channel_mode = (header >> 6) & 0x3
+    if version_bits == 1 or layer_bits != 1 or rate_index == 3 or bitrate_index in (0, 15):
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    bitrate = MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    samples_per_frame = 1152 if version == 1 else 576
+    frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": 1 if channel_mode == 3 else 2,
+        "samples_per_frame": samples_per_frame,
+        "length": frame_length,
+    }
+
+
+def parse_mp3(head: bytes, file_size: int, data_offset: int = 0) -> Optional[Dict[str, Any]]:
+    """Parse an MP3 whose audio data starts at `data_offset` (after ID3v2).
+
+    `head` must start at `data_offset` in the file.
+    """
+    # Find the first frame whose successor is also a valid frame
+    frame = None
+    position = 0
+    limit = min(len(head) - 4, 16 * 1024)
+    while position < limit:
+        position = head.find(b"\xff", position, limit)
+        if position < 0:
+            return None
+        frame = _mp3_frame(head, position)
+        if frame is not None:
+            following = _mp3_frame(head, position + frame["length"])
+            if following is not None and following["sample_rate"] == frame["sample_rate"]:
+                break
+        frame = None
+        position += 1
+    if frame is None:
+        return None
+
+    # Xing/Info (VBR or LAME CBR) header in the side-info area of the first frame
+    if frame["version"] == 1:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    xing = position + 4 + side_info
+    frames = None
+    padding_samples = 0
+    if head[xing:xing + 4] in (b"Xing", b"Info") and xing + 12 <= len(head):
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        cursor = xing + 8
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", head, cursor)[0]
+            cursor += 4
+        cursor += (4 if flags & 0x2 else 0) + (100 if flags & 0x4 else 0) + (4 if flags & 0x8 else 0)
+        # LAME extension: encoder delay and padding are trimmed from the duration
+        if head[cursor:cursor + 4] in (b"LAME", b"Lavf", b"Lavc") and cursor + 24 <= len(head):
+            delays = int.from_bytes(head[cursor + 21:cursor + 24], "big")
+            padding_samples = (delays >> 12) + (delays & 0xFFF)
+    elif head[position + 36:position + 40] == b"VBRI" and position + 54 <= len(head):
+        frames = struct.unpack_from(">I", head, position + 36 + 14)[0]
+
+    if frames:
+        samples = frames * frame["samples_per_frame"] - padding_samples
+        duration = samples / frame["sample_rate"]
+    else:
+        # Constant bit rate: estimate from the audio payload size, like ffprobe
+        duration = (file_size - data_offset - position) * 8 / frame["bitrate"]
+
+    return _result(duration, frame["sample_rate"], frame["channels"], "mp3", file_size)
+
+
+def parse_audio_header(
+    head: bytes,
+    tail: bytes,
+    file_size: int,
+    data_offset: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """Parse the probe fields from the start (and end) of a file.
+
+    `head` starts at byte `data_offset` of the file, which callers set to
+    the ID3v2 tag length when the tag is larger than HEAD_BYTES.
+    """
+    try:
+        if data_offset == 0:
+            if head[:4] == b"RIFF":
+                return parse_wav(head, file_size)
+            if head[:4] == b"OggS":
+                return parse_ogg(head, tail, file_size)
+            offset = id3v2_size(head)
+            if head[offset:offset + 4] == b"fLaC":
+                return parse_flac(head, file_size)
+            return parse_mp3(head[offset:], file_size, offset)
+        return parse_mp3(head, file_size, data_offset)
+    except (struct.error, ValueError, IndexError, KeyError, ZeroDivisionError):
+        return None
@@ -1,15 +1,103 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import uvicorn
 import os
 from dotenv import load_dotenv
 import json
-import subprocess
+import asyncio
+import re
+from collections import OrderedDict
+import httpx
+
+from headers import HEAD_BYTES, TAIL_BYTES, id3v2_size, parse_audio_header
+from normalize import ArtifactStore
 
 load_dotenv()
 
+# ffprobe runs as asyncio subprocesses, bounded in number and duration
+PROBE_MAX_CONCURRENCY = int(os.getenv("PROBE_MAX_CONCURRENCY", (os.cpu_count() or 1) * 2))
+PROBE_TIMEOUT_SECONDS = float(os.getenv("PROBE_TIMEOUT_SECONDS", 30))
+
+probe_semaphore = asyncio.Semaphore(PROBE_MAX_CONCURRENCY)
+
+# Parsed probe results, shared by /probe, /probe-batch and /validate
+PROBE_CACHE_SIZE = int(os.getenv("PROBE_CACHE_SIZE", 4096))
+
+class ProbeCache:
+    """LRU of probe results keyed by file identity (path, size, mtime)"""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return result
+    
+    def put(self, key, result: Dict[str, Any]):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "in_flight": len(self.in_flight)
+        }
+
+probe_cache = ProbeCache(PROBE_CACHE_SIZE)
+
+# Parse WAV/FLAC/Ogg/MP3 headers in-process, using ffprobe only as a fallback
+PROBE_FAST_PATH = os.getenv("PROBE_FAST_PATH", "true").lower() == "true"
+
+probe_sources = {"fast_path": 0, "ffprobe": 0}
+
+# Remote probes fetch only header/tail byte ranges over a shared connection pool
+PROBE_HTTP_TIMEOUT_SECONDS = float(os.getenv("PROBE_HTTP_TIMEOUT_SECONDS", 10))
+PROBE_HTTP_MAX_CONNECTIONS = int(os.getenv("PROBE_HTTP_MAX_CONNECTIONS", 32))
+
+http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=PROBE_HTTP_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=PROBE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=PROBE_HTTP_MAX_CONNECTIONS
+            )
+        )
+    return http_client
+
+remote_stats = {"probes": 0, "range_requests": 0, "bytes_fetched": 0, "ffprobe_fallbacks": 0}
+
+# Normalized 16 kHz mono artifacts, shared with asr-worker through this directory
+PROBE_ARTIFACT_DIR = os.getenv("PROBE_ARTIFACT_DIR", "/tmp/normalized-audio")
+NORMALIZE_MAX_CONCURRENCY = int(os.getenv("NORMALIZE_MAX_CONCURRENCY", os.cpu_count() or 1))
+# ffmpeg is killed if a transcode takes longer, freeing its concurrency slot
+NORMALIZE_TIMEOUT_SECONDS = float(os.getenv("NORMALIZE_TIMEOUT_SECONDS", 900))
+
+artifact_store = ArtifactStore(PROBE_ARTIFACT_DIR, NORMALIZE_MAX_CONCURRENCY, NORMALIZE_TIMEOUT_SECONDS)
+
 app = FastAPI(title="Probe Worker", version="1.0.0")
 
 # CORS middleware
@@ -22,7 +110,8 @@ app.add_middleware(
 )
 
 class ProbeRequest(BaseModel):
-    file_path: str
+    file_path: Optional[str] = None
+    url: Optional[str] = None
 
 class ProbeResponse(BaseModel):
     duration: float
@@ -31,15 +120,54 @@ class ProbeResponse(BaseModel):
     format: str
     bit_rate: Optional[int] = None
     valid: bool
+    error: Optional[str] = None
+
+class ProbeBatchRequest(BaseModel):
+    file_paths: List[str]
+
+class NormalizeRequest(BaseModel):
+    file_path: str
+
+class NormalizeResponse(BaseModel):
+    artifact_id: str
+    artifact_path: str
+    source_sha256: str
+    duration: float
+    sample_rate: int
+    channels: int
+    format: str
+    rms_dbfs: float
+    peak_dbfs: float
+    silence_fraction: float
+    silence_seconds: float
+    longest_silence_seconds: float
+    leading_silence_seconds: float
+    trailing_silence_seconds: float
+    cached: bool
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "probe-worker"}
 
+@app.on_event("shutdown")
+async def shutdown():
+    if http_client is not None:
+        await http_client.aclose()
+
+async def probe_request_target(request: ProbeRequest) -> Dict[str, Any]:
+    """Probe whichever of file_path or url the request names"""
+    if (request.file_path is None) == (request.url is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of file_path or url")
+    if request.url is not None:
+        if not request.url.startswith(("http://", "https://")):
+            raise HTTPException(status_code=400, detail="url must be http or https")
+        return await probe_url(request.url)
+    return await probe_audio_file(request.file_path)
+
 @app.post("/probe", response_model=ProbeResponse)
 async def probe_audio(request: ProbeRequest):
     try:
-        probe_info = probe_audio_file(request.file_path)
+        probe_info = await probe_request_target(request)
         
         return ProbeResponse(
             duration=probe_info["duration"],
@@ -47,13 +175,183 @@ async def probe_audio(request: ProbeRequest):
             channels=probe_info["channels"],
             format=probe_info["format"],
             bit_rate=probe_info.get("bit_rate"),
-            valid=probe_info["valid"]
+            valid=probe_info["valid"],
+            error=probe_info.get("error")
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def probe_audio_file(file_path: str) -> Dict[str, Any]:
+@app.post("/probe-batch")
+async def probe_batch(request: ProbeBatchRequest):
+    """Probe many files concurrently, streaming NDJSON results as each completes"""
+    async def probe_one(file_path: str) -> Dict[str, Any]:
+        return {"file_path": file_path, **await probe_audio_file(file_path)}
+    
+    async def results():
+        tasks = [asyncio.ensure_future(probe_one(path)) for path in request.file_paths]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield json.dumps({"file_path": result["file_path"], **ProbeResponse(**result).model_dump()}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+def invalid_probe_result(error: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "duration": 0.0,
+        "sample_rate": 0,
+        "channels": 0,
+        "format": "unknown",
+        "valid": False,
+        "error": error
+    }
+
+def file_identity(file_path: str):
+    """Cache key that changes whenever the file is replaced or rewritten"""
+    stat = os.stat(file_path)
+    return (os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns)
+
+async def probe_audio_file(file_path: str) -> Dict[str, Any]:
+    """Probe audio file, reusing cached results for unchanged files"""
+    try:
+        key = file_identity(file_path)
+    except OSError:
+        return await run_ffprobe(file_path)
+    
+    cached = probe_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    
+    # Concurrent requests for the same file share one ffprobe run
+    pending = probe_cache.in_flight.get(key)
+    if pending is not None:
+        probe_cache.hits += 1
+        return dict(await asyncio.shield(pending))
+    
+    probe_cache.misses += 1
+    pending = asyncio.ensure_future(probe_uncached(file_path))
+    probe_cache.in_flight[key] = pending
+    try:
+        result = await asyncio.shield(pending)
+    finally:
+        probe_cache.in_flight.pop(key, None)
+    
+    # Timeouts and other transient failures are not cached
+    if result.get("error") is None:
+        probe_cache.put(key, result)
+    return dict(result)
+
+def read_header_bytes(file_path: str):
+    """Read the head and tail of a file for header parsing.
+
+    Returns (head, tail, file_size, data_offset); when an ID3v2 tag is
+    larger than the head window, the head is re-read from the tag's end.
+    """
+    with open(file_path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        head = f.read(HEAD_BYTES)
+        data_offset = 0
+        tag_size = id3v2_size(head)
+        if tag_size > HEAD_BYTES - 4096:
+            data_offset = tag_size
+            f.seek(data_offset)
+            head = f.read(HEAD_BYTES)
+        f.seek(max(0, file_size - TAIL_BYTES))
+        tail = f.read(TAIL_BYTES)
+    return head, tail, file_size, data_offset
+
+async def probe_uncached(file_path: str) -> Dict[str, Any]:
+    """Probe from the container header when possible, else with ffprobe"""
+    if PROBE_FAST_PATH:
+        try:
+            result = parse_audio_header(*await asyncio.to_thread(read_header_bytes, file_path))
+        except OSError:
+            result = None
+        if result is not None:
+            probe_sources["fast_path"] += 1
+            return result
+    
+    probe_sources["ffprobe"] += 1
+    return await run_ffprobe(file_path)
+
+async def fetch_range(url: str, start: int, end: int):
+    """GET bytes [start, end] of `url`.
+
+    Returns (data, total_size), or None when the server does not honour
+    range requests, in which case the body is not downloaded.
+    """
+    client = get_http_client()
+    async with client.stream("GET", url, headers={"Range": f"bytes={start}-{end}"}) as response:
+        if response.status_code == 416:
+            return b"", 0
+        response.raise_for_status()
+        match = re.match(r"bytes \d+-\d+/(\d+)", response.headers.get("content-range", ""))
+        if response.status_code != 206 or match is None:
+            return None
+        
+        data = bytearray()
+        async for chunk in response.aiter_bytes():
+            data.extend(chunk)
+            if len(data) > end - start:
+                break
+        remote_stats["range_requests"] += 1
+        remote_stats["bytes_fetched"] += len(data)
+        return bytes(data[:end - start + 1]), int(match.group(1))
+
+async def read_remote_header_bytes(url: str):
+    """Remote counterpart of read_header_bytes, using at most three range requests"""
+    fetched = await fetch_range(url, 0, HEAD_BYTES - 1)
+    if fetched is None:
+        return None
+    head, file_size = fetched
+    
+    data_offset = 0
+    tag_size = id3v2_size(head)
+    if tag_size > HEAD_BYTES - 4096 and tag_size < file_size:
+        data_offset = tag_size
+        fetched = await fetch_range(url, data_offset, data_offset + HEAD_BYTES - 1)
+        if fetched is None:
+            return None
+        head = fetched[0]
+    
+    # Only Ogg keeps its duration at the end of the file
+    tail = b""
+    if head[:4] == b"OggS":
+        if file_size <= HEAD_BYTES:
+            tail = head
+        else:
+            fetched = await fetch_range(url, max(0, file_size - TAIL_BYTES), file_size - 1)
+            if fetched is None:
+                return None
+            tail = fetched[0]
+    return head, tail, file_size, data_offset
+
+async def probe_url(url: str) -> Dict[str, Any]:
+    """Probe remote media from its header bytes without downloading it"""
+    remote_stats["probes"] += 1
+    try:
+        header_bytes = await read_remote_header_bytes(url)
+    except httpx.HTTPStatusError as e:
+        return invalid_probe_result(f"HTTP {e.response.status_code} fetching {url}")
+    except httpx.HTTPError as e:
+        return invalid_probe_result(f"Failed to fetch {url}: {e}")
+    
+    if header_bytes is not None:
+        result = parse_audio_header(*header_bytes)
+        if result is not None:
+            return result
+    
+    # ffprobe reads http(s) inputs itself, seeking with range requests as needed
+    remote_stats["ffprobe_fallbacks"] += 1
+    return await run_ffprobe(url)
+
+async def run_ffprobe(file_path: str) -> Dict[str, Any]:
     """Probe audio file using ffprobe"""
     try:
         # Use ffprobe to get audio information
@@ -66,60 +364,70 @@ def probe_audio_file(file_path: str) -> Dict[str, Any]:
             file_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            return {
-                "duration": 0.0,
-                "sample_rate": 0,
-                "channels": 0,
-                "format": "unknown",
-                "valid": False
-            }
-        
-        probe_data = json.loads(result.stdout)
+        async with probe_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), timeout=PROBE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return invalid_probe_result(f"ffprobe timed out after {PROBE_TIMEOUT_SECONDS}s")
+            except asyncio.CancelledError:
+                process.kill()
+                raise
         
-        # Extract audio stream info
-        audio_stream = None
-        for stream in probe_data.get("streams", []):
-            if stream.get("codec_type") == "audio":
-                audio_stream = stream
-                break
-        
-        if not audio_stream:
-            return {
-                "duration": 0.0,
-                "sample_rate": 0,
-                "channels": 0,
-                "format": "unknown",
-                "valid": False
-            }
+        if process.returncode != 0:
+            return invalid_probe_result()
         
-        format_info = probe_data.get("format", {})
-        
-        return {
-            "duration": float(format_info.get("duration", 0)),
-            "sample_rate": int(audio_stream.get("sample_rate", 0)),
-            "channels": int(audio_stream.get("channels", 0)),
-            "format": audio_stream.get("codec_name", "unknown"),
-            "bit_rate": int(format_info.get("bit_rate", 0)) if format_info.get("bit_rate") else None,
-            "valid": True
-        }
+        return parse_probe_output(stdout)
         
     except Exception as e:
-        return {
-            "duration": 0.0,
-            "sample_rate": 0,
-            "channels": 0,
-            "format": "unknown",
-            "valid": False
-        }
+        return invalid_probe_result(str(e))
+
+def parse_probe_output(stdout: bytes) -> Dict[str, Any]:
+    """Extract the audio fields we report from ffprobe JSON output"""
+    probe_data = json.loads(stdout)
+    
+    # Extract audio stream info
+    audio_stream = None
+    for stream in probe_data.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            audio_stream = stream
+            break
+    
+    if not audio_stream:
+        return invalid_probe_result()
+    
+    format_info = probe_data.get("format", {})
+    
+    return {
+        "duration": float(format_info.get("duration", 0)),
+        "sample_rate": int(audio_stream.get("sample_rate", 0)),
+        "channels": int(audio_stream.get("channels", 0)),
+        "format": audio_stream.get("codec_name", "unknown"),
+        "bit_rate": int(format_info.get("bit_rate", 0)) if format_info.get("bit_rate") else None,
+        "valid": True
+    }
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Probe cache size and hit rate"""
+    return probe_cache.stats()
+
+@app.get("/probe/stats")
+async def probe_stats():
+    """How many uncached probes used the header fast path vs ffprobe"""
+    return {"fast_path_enabled": PROBE_FAST_PATH, **probe_sources, "remote": remote_stats}
 
 @app.post("/validate")
 async def validate_audio(request: ProbeRequest):
     """Validate audio file for processing"""
     try:
-        probe_info = probe_audio_file(request.file_path)
+        probe_info = await probe_request_target(request)
         
         # Validation rules
         max_duration = 3600  # 1 hour
@@ -151,9 +459,27 @@ async def validate_audio(request: ProbeRequest):
         
         return validation_result
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/normalize", response_model=NormalizeResponse)
+async def normalize_audio(request: NormalizeRequest):
+    """Transcode to a content-addressed 16 kHz mono float WAV that asr-worker
+    can load without decoding, with loudness and silence statistics"""
+    if not os.path.isfile(request.file_path):
+        raise HTTPException(status_code=404, detail=f"File not found: {request.file_path}")
+    try:
+        return NormalizeResponse(**await artifact_store.normalize(request.file_path))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/normalize/stats")
+async def normalize_stats():
+    """Artifact reuse and transcode time"""
+    return artifact_store.stats()
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8009))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+PIPE_CHUNK_BYTES = 256 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+# Only the end of ffmpeg's error log goes into the exception message
+STDERR_TAIL_BYTES = 4096
+# Bump when the output format or the statistics change so old artifacts are not reused
+NORMALIZE_VERSION = 1
+
+
+def wav_header(num_samples: int, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """44-byte header for mono 32-bit float WAV (WAVE_FORMAT_IEEE_FLOAT)"""
+    data_size = num_samples * 4
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 0x0003, 1, sample_rate, sample_rate * 4, 4, 32,
+        b"data", data_size,
+    )
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AudioStats:
+    """Running loudness and silence statistics over streamed float32 samples.
+
+    Samples are grouped into fixed frames; a frame is silent when its RMS
+    level is below `silence_db`. Partial frames are carried to the next chunk.
+    """
+
+    def __init__(self, frame_ms: float = 30, silence_db: float = -50, sample_rate: int = SAMPLE_RATE):
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.silence_db = silence_db
+        self.sample_rate = sample_rate
+        self.carry = np.zeros(0, dtype=np.float32)
+        self.samples = 0
+        self.sum_squares = 0.0
+        self.peak = 0.0
+        self.frames = 0
+        self.silent_frames = 0
+        self.run = 0
+        self.longest_run = 0
+        self.leading = None
+
+    def update(self, samples: np.ndarray) -> None:
+        self.samples += len(samples)
+        if len(samples):
+            self.sum_squares += float(np.dot(samples, samples))
+            self.peak = max(self.peak, float(np.max(np.abs(samples))))
+
+        samples = np.concatenate([self.carry, samples])
+        n_frames = len(samples) // self.frame
+        self.carry = samples[n_frames * self.frame:]
+        if n_frames:
+            frames = samples[: n_frames * self.frame].reshape(n_frames, self.frame)
+            level_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+            self._count(level_db < self.silence_db)
+
+    def _count(self, silent: np.ndarray) -> None:
+        loud = np.flatnonzero(~silent)
+        if self.leading is None and len(loud):
+            self.leading = self.frames + int(loud[0])
+
+        # Longest silent run, including runs that continue across chunks
+        padded = np.concatenate([[False], silent, [False]])
+        edges = np.flatnonzero(np.diff(padded.astype(np.int8))).reshape(-1, 2)
+        for start, end in edges:
+            length = int(end - start)
+            if start == 0:
+                length += self.run
+            self.longest_run = max(self.longest_run, length)
+        if len(loud):
+            self.run = len(silent) - 1 - int(loud[-1])
+        else:
+            self.run += len(silent)
+
+        self.frames += len(silent)
+        self.silent_frames += int(silent.sum())
+
+    def result(self) -> Dict[str, Any]:
+        frame_seconds = self.frame / self.sample_rate
+        rms = (self.sum_squares / self.samples) ** 0.5 if self.samples else 0.0
+        leading = self.frames if self.leading is None else self.leading
+        return {
+            "rms_dbfs": round(float(20 * np.log10(rms + 1e-10)), 2),
+            "peak_dbfs": round(float(20 * np.log10(self.peak + 1e-10)), 2),
+            "silence_fraction": round(self.silent_frames / self.frames, 4) if self.frames else 1.0,
+            "silence_seconds": round(self.silent_frames * frame_seconds, 3),
+            "longest_silence_seconds": round(self.longest_run * frame_seconds, 3),
+            "leading_silence_seconds": round(leading * frame_seconds, 3),
+            "trailing_silence_seconds": round(min(self.run, self.frames - leading) * frame_seconds, 3),
+        }
+
+
+async def read_tail(stream: asyncio.StreamReader, limit: int = STDERR_TAIL_BYTES) -> bytes:
+    """Drain `stream` to EOF, keeping only its last `limit` bytes"""
+    tail = b""
+    while True:
+        chunk = await stream.read(PIPE_CHUNK_BYTES)
+        if not chunk:
+            return tail
+        tail = (tail + chunk)[-limit:]
+
+
+async def transcode(
+    source: str,
+    destination: str,
+    sample_rate: int = SAMPLE_RATE,
+    timeout_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Transcode `source` to a mono float WAV at `destination` in one ffmpeg pass,
+    computing statistics on the samples as they stream through.
+
+    stderr is drained concurrently so a long error log cannot block ffmpeg,
+    and the process is killed after `timeout_seconds`.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-v", "error",
+        "-i", source,
+        "-f", "f32le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stderr_task = asyncio.ensure_future(read_tail(process.stderr))
+    stats = AudioStats(sample_rate=sample_rate)
+
+    async def pump(out) -> None:
+        pending = b""
+        while True:
+            chunk = await process.stdout.read(PIPE_CHUNK_BYTES)
+            if not chunk:
+                break
+            out.write(chunk)
+            # Pipe reads are not aligned to whole samples
+            pending += chunk
+            usable = len(pending) // 4 * 4
+            stats.update(np.frombuffer(pending[:usable], dtype="<f4"))
+            pending = pending[usable:]
+        await process.wait()
+
+    try:
+        with open(destination, "wb") as out:
+            # Placeholder header, rewritten once the sample count is known
+            out.write(wav_header(0, sample_rate))
+            try:
+                await asyncio.wait_for(pump(out), timeout_seconds)
+            except asyncio.TimeoutError:
+                raise RuntimeError(f"Transcoding audio timed out after {timeout_seconds}s")
+
+            stderr = await stderr_task
+            if process.returncode != 0:
+                raise RuntimeError(f"Failed to transcode audio: {stderr.decode(errors='replace').strip()}")
+
+            out.seek(0)
+            out.write(wav_header(stats.samples, sample_rate))
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr_task.cancel()
+        raise
+
+    return {
+        "duration": round(stats.samples / sample_rate, 3),
+        "sample_rate": sample_rate,
+        "channels": 1,
+        "format": "pcm_f32le",
+        **stats.result(),
+    }
+
+
+class ArtifactStore:
+    """Content-addressed normalized audio: <sha256>.wav plus a <sha256>.json sidecar.
+
+    The key covers the source bytes and NORMALIZE_VERSION, so the same
+    upload is only transcoded once no matter its path or how often it is
+    submitted. Concurrent requests for the same content share one transcode.
+    """
+
+    def __init__(self, directory: str, max_concurrency: int, timeout_seconds: Optional[float] = None):
+        self.directory = directory
+        self.timeout_seconds = timeout_seconds
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.transcode_seconds = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def paths(self, key: str):
+        return os.path.join(self.directory, f"{key}.wav"), os.path.join(self.directory, f"{key}.json")
+
+    async def normalize(self, source: str) -> Dict[str, Any]:
+        content_hash = await asyncio.to_thread(hash_file, source)
+        key = hashlib.sha256(f"{content_hash}:v{NORMALIZE_VERSION}".encode()).hexdigest()
+
+        existing = await asyncio.to_thread(self._load, key)
+        if existing is not None:
+            self.hits += 1
+            return {**existing, "cached": True}
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return {**await asyncio.shield(pending), "cached": True}
+
+        self.misses += 1
+        pending = asyncio.ensure_future(self._create(key, content_hash, source))
+        self.in_flight[key] = pending
+        try:
+            result = await asyncio.shield(pending)
+        finally:
+            self.in_flight.pop(key, None)
+        return {**result, "cached": False}
+
+    def _load(self, key: str):
+        artifact_path, meta_path = self.paths(key)
+        if not os.path.exists(artifact_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    async def _create(self, key: str, content_hash: str, source: str) -> Dict[str, Any]:
+        artifact_path, meta_path = self.paths(key)
+        fd, scratch_path = tempfile.mkstemp(suffix=".wav", dir=self.directory)
+        os.close(fd)
+        try:
+            loop = asyncio.get_running_loop()
+            async with self.semaphore:
+                started = loop.time()
+                info = await transcode(source, scratch_path, timeout_seconds=self.timeout_seconds)
+                self.transcode_seconds += loop.time() - started
+
+            result = {
+                "artifact_id": key,
+                "artifact_path": artifact_path,
+                "source_sha256": content_hash,
+                **info,
+            }
+            with open(meta_path, "w") as f:
+                json.dump(result, f)
+            # Publish the audio last: its presence marks the artifact complete
+            os.replace(scratch_path, artifact_path)
+            return result
+        finally:
+            if os.path.exists(scratch_path):
+                os.remove(scratch_path)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "in_flight": len(self.in_flight),
+            "transcode_seconds": round(self.transcode_seconds, 3),
+        }
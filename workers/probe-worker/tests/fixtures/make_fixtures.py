@@ -0,0 +1,96 @@
+"""Regenerate the audio fixtures in this directory.
+
+Needs ffmpeg on PATH. Tones are short and low-rate to keep the files
+small. VBRI and the damaged files are derived from ffmpeg output, since
+ffmpeg cannot write them directly.
+
+    python tests/fixtures/make_fixtures.py
+"""
+import os
+import struct
+import subprocess
+
+FIXTURES = os.path.dirname(os.path.abspath(__file__))
+
+# name: ffmpeg output options
+ENCODED = {
+    "pcm_s16.wav": "-c:a pcm_s16le -ar 16000 -ac 1",
+    "pcm_u8.wav": "-c:a pcm_u8 -ar 8000 -ac 1",
+    "pcm_mulaw.wav": "-c:a pcm_mulaw -ar 8000 -ac 1",
+    "pcm_f32_stereo.wav": "-c:a pcm_f32le -ar 4000 -ac 2",
+    # More than two channels makes ffmpeg write WAVE_FORMAT_EXTENSIBLE
+    "pcm_u8_extensible.wav": "-c:a pcm_u8 -ar 8000 -ac 3",
+    "tone.flac": "-c:a flac -ar 16000 -ac 1",
+    "vorbis.ogg": "-c:a libvorbis -ar 22050 -ac 1",
+    "opus.opus": "-c:a libopus -b:a 16k -ar 48000 -ac 1",
+    "flac.oga": "-c:a flac -ar 16000 -ac 1 -f ogg",
+    "cbr.mp3": "-c:a libmp3lame -b:a 32k -ar 16000 -ac 1 -write_xing 0",
+    "cbr_info.mp3": "-c:a libmp3lame -b:a 32k -ar 22050 -ac 1",
+    "vbr_xing.mp3": "-c:a libmp3lame -q:a 7 -ar 22050 -ac 1",
+    # Tag larger than the 64 KB header window, so the parser re-reads past it
+    "id3_large.mp3": "-c:a libmp3lame -b:a 32k -ar 16000 -ac 1 -metadata comment=" + "x" * 80000,
+    "id3_small.mp3": "-c:a libmp3lame -b:a 48k -ar 44100 -ac 1 -metadata title=fixture",
+}
+
+
+def encode(name: str, options: str) -> None:
+    path = os.path.join(FIXTURES, name)
+    command = ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=1.2"]
+    subprocess.run(command + options.split() + [path], check=True)
+
+
+def mp3_frames(data: bytes):
+    """Offsets of the MPEG-1 layer III frames of a tag-less CBR file"""
+    position = 0
+    while position + 4 <= len(data):
+        header = struct.unpack_from(">I", data, position)[0]
+        if header >> 21 != 0x7FF:
+            break
+        bitrate = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320][(header >> 12) & 0xF] * 1000
+        sample_rate = [44100, 48000, 32000][(header >> 10) & 0x3]
+        yield position
+        position += 144 * bitrate // sample_rate + ((header >> 9) & 0x1)
+
+
+def write_vbri() -> None:
+    """MPEG-1 CBR stream whose first frame carries a Fraunhofer VBRI header"""
+    path = os.path.join(FIXTURES, "vbri.mp3")
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=1.2",
+         "-c:a", "libmp3lame", "-b:a", "64k", "-ar", "32000", "-ac", "1", "-write_xing", "0", "-id3v2_version", "0",
+         path],
+        check=True,
+    )
+    data = bytearray(open(path, "rb").read())
+    frames = len(list(mp3_frames(bytes(data))))
+    # The first frame becomes the tag frame, as in encoder output, so it is not counted
+    vbri = b"VBRI" + struct.pack(">HHHII", 1, 576, 75, len(data), frames - 1) + struct.pack(">HHHH", 0, 1, 2, 1)
+    data[36:36 + len(vbri)] = vbri
+    open(path, "wb").write(bytes(data))
+
+
+def write_damaged() -> None:
+    wav = open(os.path.join(FIXTURES, "pcm_s16.wav"), "rb").read()
+    flac = open(os.path.join(FIXTURES, "tone.flac"), "rb").read()
+    ogg = open(os.path.join(FIXTURES, "vorbis.ogg"), "rb").read()
+    damaged = {
+        # RIFF header with nothing after it
+        "truncated_header.wav": wav[:20],
+        # fmt chunk claims zero channels
+        "zero_channels.wav": wav[:22] + b"\x00\x00" + wav[24:4096],
+        # First STREAMINFO block replaced by a PADDING block
+        "no_streaminfo.flac": flac[:4] + bytes([flac[4] & 0x80 | 1]) + flac[5:4096],
+        # Capture pattern of the first page destroyed
+        "broken_page.ogg": b"OggX" + ogg[4:],
+        # Bytes that never form two consecutive MPEG frames
+        "noise.mp3": bytes((index * 37 + 11) % 251 for index in range(4096)),
+    }
+    for name, data in damaged.items():
+        open(os.path.join(FIXTURES, name), "wb").write(data)
+
+
+if __name__ == "__main__":
+    for name, options in ENCODED.items():
+        encode(name, options)
+    write_vbri()
+    write_damaged()
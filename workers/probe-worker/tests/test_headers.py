@@ -0,0 +1,66 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from headers import parse_audio_header
+from main import parse_probe_output, read_header_bytes
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# name: (format, sample_rate, channels)
+SUPPORTED = {
+    "pcm_s16.wav": ("pcm_s16le", 16000, 1),
+    "pcm_u8.wav": ("pcm_u8", 8000, 1),
+    "pcm_mulaw.wav": ("pcm_mulaw", 8000, 1),
+    "pcm_f32_stereo.wav": ("pcm_f32le", 4000, 2),
+    "pcm_u8_extensible.wav": ("pcm_u8", 8000, 3),
+    "tone.flac": ("flac", 16000, 1),
+    "vorbis.ogg": ("vorbis", 22050, 1),
+    "opus.opus": ("opus", 48000, 1),
+    "flac.oga": ("flac", 16000, 1),
+    "cbr.mp3": ("mp3", 16000, 1),
+    "cbr_info.mp3": ("mp3", 22050, 1),
+    "vbr_xing.mp3": ("mp3", 22050, 1),
+    "vbri.mp3": ("mp3", 32000, 1),
+    "id3_large.mp3": ("mp3", 16000, 1),
+    "id3_small.mp3": ("mp3", 44100, 1),
+}
+
+DAMAGED = ["truncated_header.wav", "zero_channels.wav", "no_streaminfo.flac", "broken_page.ogg", "noise.mp3"]
+
+
+def fast_probe(name):
+    return parse_audio_header(*read_header_bytes(os.path.join(FIXTURES, name)))
+
+
+@pytest.mark.parametrize("name", sorted(SUPPORTED))
+def test_parses_supported_fixture(name):
+    result = fast_probe(name)
+    assert result is not None
+    assert (result["format"], result["sample_rate"], result["channels"]) == SUPPORTED[name]
+    # Every fixture is a 1.2 s tone; MP3 frames and Opus pre-skip add a little
+    assert 1.15 <= result["duration"] <= 1.35
+
+
+@pytest.mark.parametrize("name", DAMAGED)
+def test_damaged_header_falls_back(name):
+    assert fast_probe(name) is None
+
+
+@pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobe not installed")
+@pytest.mark.parametrize("name", sorted(SUPPORTED))
+def test_matches_ffprobe(name):
+    output = subprocess.run(
+        ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", os.path.join(FIXTURES, name)],
+        capture_output=True,
+        check=True,
+    ).stdout
+    expected = parse_probe_output(output)
+    result = fast_probe(name)
+
+    for field in ("format", "sample_rate", "channels", "valid"):
+        assert result[field] == expected[field], field
+    assert result["duration"] == pytest.approx(expected["duration"], abs=0.03)
+    assert result["bit_rate"] == pytest.approx(expected["bit_rate"], rel=0.02)
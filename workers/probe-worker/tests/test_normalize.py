@@ -0,0 +1,59 @@
+import asyncio
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from normalize import SAMPLE_RATE, transcode
+
+# Stand-in for ffmpeg: writes `stderr_bytes` of log, then one second of
+# float32 samples to stdout, then sleeps `sleep` seconds and exits `code`
+STUB = """#!{python}
+import sys, time
+sys.stderr.write("x" * {stderr_bytes})
+sys.stderr.flush()
+sys.stdout.buffer.write(b"\\x00\\x00\\x80\\x3f" * 16000)
+sys.stdout.flush()
+time.sleep({sleep})
+sys.exit({code})
+"""
+
+
+@pytest.fixture
+def stub_ffmpeg(tmp_path, monkeypatch):
+    def install(stderr_bytes=0, sleep=0, code=0):
+        path = tmp_path / "ffmpeg"
+        path.write_text(STUB.format(python=sys.executable, stderr_bytes=stderr_bytes, sleep=sleep, code=code))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return install
+
+
+def run_transcode(tmp_path, timeout_seconds):
+    source = tmp_path / "input.mp3"
+    source.write_bytes(b"not really audio")
+    return asyncio.run(transcode(str(source), str(tmp_path / "out.wav"), timeout_seconds=timeout_seconds))
+
+
+def test_large_error_log_does_not_stall_transcode(stub_ffmpeg, tmp_path):
+    stub_ffmpeg(stderr_bytes=2_000_000)
+    result = run_transcode(tmp_path, 10)
+    assert result["duration"] == 1.0
+    assert os.path.getsize(tmp_path / "out.wav") == 44 + SAMPLE_RATE * 4
+
+
+def test_failure_reports_end_of_log(stub_ffmpeg, tmp_path):
+    stub_ffmpeg(stderr_bytes=2_000_000, code=1)
+    with pytest.raises(RuntimeError, match="Failed to transcode audio: x+$") as error:
+        run_transcode(tmp_path, 10)
+    assert len(str(error.value)) < 5000
+
+
+def test_slow_transcode_is_killed(stub_ffmpeg, tmp_path):
+    stub_ffmpeg(sleep=30)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="timed out"):
+        run_transcode(tmp_path, 1)
+    assert time.monotonic() - started < 10
@@ -0,0 +1,110 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SUPPORTED = [
+    "pcm_s16.wav", "pcm_u8_extensible.wav", "tone.flac", "vorbis.ogg", "opus.opus", "flac.oga",
+    "cbr.mp3", "vbr_xing.mp3", "vbri.mp3", "id3_large.mp3", "id3_small.mp3",
+]
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves the fixtures with single-range support; paths under /norange/
+    ignore Range like a server without it"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        ignore_range = self.path.startswith("/norange/")
+        path = os.path.join(FIXTURES, os.path.basename(self.path))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match is None or ignore_range:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        start = int(match.group(1))
+        if start >= len(data):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(data)}")
+            self.end_headers()
+            return
+        end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+    main.http_client = None
+
+
+@pytest.mark.parametrize("name", SUPPORTED)
+def test_url_probe_matches_local_probe(client, server_url, name):
+    local = client.post("/probe", json={"file_path": os.path.join(FIXTURES, name)}).json()
+    fetched_before = main.remote_stats["bytes_fetched"]
+    fallbacks_before = main.remote_stats["ffprobe_fallbacks"]
+
+    remote = client.post("/probe", json={"url": f"{server_url}/{name}"}).json()
+
+    assert remote == local
+    assert main.remote_stats["ffprobe_fallbacks"] == fallbacks_before
+    # Only the header window (and the tail for Ogg) is downloaded
+    assert main.remote_stats["bytes_fetched"] - fetched_before <= 2 * main.HEAD_BYTES
+
+
+def test_server_without_range_support_falls_back_to_ffprobe(client, server_url, monkeypatch):
+    probed = []
+
+    async def fake_ffprobe(target):
+        probed.append(target)
+        return main.invalid_probe_result("ffprobe stand-in")
+
+    monkeypatch.setattr(main, "run_ffprobe", fake_ffprobe)
+    result = client.post("/probe", json={"url": f"{server_url}/norange/vorbis.ogg"}).json()
+
+    assert probed == [f"{server_url}/norange/vorbis.ogg"]
+    assert result["error"] == "ffprobe stand-in"
+
+
+def test_missing_url_reports_http_status(client, server_url):
+    result = client.post("/probe", json={"url": f"{server_url}/missing.wav"}).json()
+    assert result["valid"] is False
+    assert result["error"].startswith("HTTP 404")
+
+
+@pytest.mark.parametrize("body", [{}, {"url": "ftp://example.com/a.wav"}, {"file_path": "/a.wav", "url": "http://x/a.wav"}])
+def test_rejects_invalid_targets(client, body):
+    assert client.post("/probe", json=body).status_code == 400
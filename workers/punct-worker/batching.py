@@ -0,0 +1,167 @@
+import asyncio
+import bisect
+import copy
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from punctuation import label_windows, mean_score, plan_words, restore_text, split_words, window_texts
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Observation counts per bucket, keyed by the bucket's upper bound"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PunctuationBatcher:
+    """Coalesce the windows of concurrent /punctuate calls into shared forward passes.
+
+    Every request is split into windows that are queued individually. A
+    single worker takes up to `max_batch_size` queued windows, waiting at
+    most `max_wait_seconds` after the oldest one arrived for more to show up,
+    and runs them as one padded pipeline batch in a thread. Only one batch
+    runs at a time; windows arriving meanwhile form the next one.
+    """
+
+    def __init__(self, model, max_batch_size: int, max_wait_seconds: float):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        # Window planning runs next to inference, and a fast tokenizer must not
+        # be used from two threads while its truncation settings change
+        self.tokenizer = copy.deepcopy(model.tokenizer)
+        self.tokenizer(["warm-up"], add_special_tokens=False)
+
+        self._pending: Deque[Tuple[str, asyncio.Future, float]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.requests = 0
+        self.windows = 0
+        self.batches = 0
+        self.batch_sizes: Counter = Counter()
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.inference_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.request_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    async def punctuate(self, text: str, language: str, window_tokens: int, overlap_tokens: int) -> Tuple[str, float]:
+        started = time.perf_counter()
+        words = split_words(text)
+        labels = await self.label(words, window_tokens, overlap_tokens)
+        result = restore_text(words, labels, language), mean_score(labels)
+
+        self.requests += 1
+        self.request_ms.observe((time.perf_counter() - started) * 1000)
+        return result
+
+    async def label(self, words: List[str], window_tokens: int, overlap_tokens: int) -> List[Tuple[str, float]]:
+        """(label, score) for each word"""
+        windows = await asyncio.to_thread(plan_words, self.tokenizer, words, window_tokens, overlap_tokens)
+        outputs = await self.submit(window_texts(words, windows))
+        return label_windows(words, windows, outputs)
+
+    async def submit(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Pipeline output for each text, in order"""
+        if not texts:
+            return []
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future, time.perf_counter()))
+            futures.append(future)
+        self.windows += len(texts)
+        self._wakeup.set()
+        return await asyncio.gather(*futures)
+
+    async def _run(self) -> None:
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            deadline = self._pending[0][2] + self.max_wait_seconds
+            while len(self._pending) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                job = self._pending.popleft()
+                # Skip windows whose callers have already gone away
+                if not job[1].done():
+                    batch.append(job)
+            if batch:
+                await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        for _, _, queued in batch:
+            self.queue_wait_ms.observe((started - queued) * 1000)
+        self.batches += 1
+        self.batch_sizes[len(batch)] += 1
+
+        try:
+            outputs = await asyncio.to_thread(self.model, [text for text, _, _ in batch], batch_size=len(batch))
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.inference_ms.observe((time.perf_counter() - started) * 1000)
+
+        for (_, future, _), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        batched = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "requests": self.requests,
+            "windows": self.windows,
+            "batches": self.batches,
+            "average_batch_size": batched / self.batches if self.batches else 0.0,
+            "waiting": len(self._pending),
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "inference_ms": self.inference_ms.snapshot(),
+            "request_ms": self.request_ms.snapshot(),
+        }
@@ -0,0 +1,92 @@
+"""Throughput and latency of cross-request batching under concurrent load.
+
+Short transcript segments are sent through PunctuationBatcher by many
+concurrent clients, for several batch limits, and compared with calling
+punctuate() one segment at a time. Each configuration also checks that
+batched output is identical to the unbatched output. Run from the worker
+directory:
+
+    python benchmarks/batching_benchmark.py [--model NAME] [--segments N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (max batch size, max wait ms, concurrent clients)
+SETTINGS = [(1, 0, 32), (8, 10, 32), (16, 10, 32), (32, 20, 32), (8, 10, 1)]
+
+
+def segments(count: int):
+    """`count` segments of 10-40 words from the synthetic corpus"""
+    from corpus import synthetic
+
+    words, _ = synthetic(count * 40, seed=5)
+    rng = random.Random(1)
+    result = []
+    position = 0
+    while len(result) < count:
+        length = rng.randint(10, 40)
+        result.append(" ".join(words[position:position + length]))
+        position += length
+    return result
+
+
+async def run(model, texts, reference, max_batch_size, max_wait_ms, clients) -> None:
+    from batching import PunctuationBatcher
+
+    batcher = PunctuationBatcher(model, max_batch_size, max_wait_ms / 1000)
+    slots = asyncio.Semaphore(clients)
+    latencies = []
+
+    async def one(text):
+        async with slots:
+            started = time.perf_counter()
+            output, _ = await batcher.punctuate(text, "en", 256, 32)
+            latencies.append(time.perf_counter() - started)
+            return output
+
+    started = time.perf_counter()
+    outputs = await asyncio.gather(*[one(text) for text in texts])
+    seconds = time.perf_counter() - started
+    stats = batcher.stats()
+    batcher.close()
+
+    latencies.sort()
+    identical = sum(output == expected for output, expected in zip(outputs, reference))
+    print(
+        f"max_batch={max_batch_size:2d} wait={max_wait_ms:3d}ms clients={clients:2d}: "
+        f"{len(texts) / seconds:7.1f} req/s  p50 {latencies[len(latencies) // 2] * 1000:7.1f}ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f}ms  "
+        f"average batch {stats['average_batch_size']:.1f}  identical {identical}/{len(texts)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("PUNCT_MODEL", "oliverguhr/fullstop-punctuation-multilingual"))
+    parser.add_argument("--segments", type=int, default=400)
+    args = parser.parse_args()
+
+    os.environ["PUNCT_MODEL"] = args.model
+    import main as worker
+    from punctuation import punctuate
+
+    model = worker.load_punct_model()
+    texts = segments(args.segments)
+    print(f"model: {args.model}, {len(texts)} segments")
+
+    started = time.perf_counter()
+    reference = [punctuate(model, text)[0] for text in texts]
+    print(f"sequential punctuate(): {len(texts) / (time.perf_counter() - started):7.1f} req/s")
+
+    for max_batch_size, max_wait_ms, clients in SETTINGS:
+        asyncio.run(run(model, texts, reference, max_batch_size, max_wait_ms, clients))
+
+
+if __name__ == "__main__":
+    main()
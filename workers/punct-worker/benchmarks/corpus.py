@@ -0,0 +1,91 @@
+"""Labelled corpora for the punctuation benchmarks.
+
+A corpus is a list of words with the fullstop label after each ("0" for
+none). The synthetic generator is deterministic for a seed, so numbers can
+be compared between runs; a punctuated text file gives a more realistic
+corpus for the real model, with the gold labels taken from its own
+punctuation.
+"""
+import random
+from typing import List, Sequence, Tuple
+
+# Labels of the fullstop models other than "0"
+MARKS = ".,?-:"
+
+FILLER = (
+    "so we talked about the roadmap and i think that the team agreed we should move forward with it "
+    "then budget review next quarter sales numbers were good but hiring is slow because candidates want "
+    "remote work customer support tickets doubled after launch engineering fixed the login bug yesterday"
+).split()
+STARTS = ["alright", "okay", "next", "finally"]
+ENDS = ["done", "today", "thanks", "tomorrow"]
+QUESTION_STARTS = ["can", "do", "should", "will", "is", "did"]
+CONNECTORS = ["however", "although", "whereas"]
+
+
+def _sentence(rng: random.Random) -> Tuple[List[str], List[str]]:
+    length = rng.randint(4, 18)
+    words = rng.choices(FILLER, k=length)
+    labels = ["0"] * length
+    if rng.random() < 0.25:
+        words[0], end = rng.choice(QUESTION_STARTS), "?"
+    else:
+        words[0], end = rng.choice(STARTS), "."
+    words[-1] = rng.choice(ENDS)
+    if length > 8 and rng.random() < 0.6:
+        comma = rng.randint(2, length - 4)
+        labels[comma] = ","
+        words[comma + 1] = rng.choice(CONNECTORS)
+    if length > 8 and rng.random() < 0.6:
+        labels[rng.randint(2, length - 4)] = ","
+    if length > 10 and rng.random() < 0.15:
+        labels[rng.randint(2, length - 4)] = ":"
+    labels[-1] = end
+    return words, labels
+
+
+def synthetic(n_words: int, seed: int = 11) -> Tuple[List[str], List[str]]:
+    """Unpunctuated meeting-style sentences of at least `n_words` words"""
+    rng = random.Random(seed)
+    words: List[str] = []
+    labels: List[str] = []
+    while len(words) < n_words:
+        sentence_words, sentence_labels = _sentence(rng)
+        words += sentence_words
+        labels += sentence_labels
+    return words, labels
+
+
+def from_text(path: str, n_words: int = 0) -> Tuple[List[str], List[str]]:
+    """Words and gold labels from a punctuated text file (the first `n_words` if set)"""
+    with open(path, encoding="utf-8") as f:
+        tokens = f.read().split()
+    words: List[str] = []
+    labels: List[str] = []
+    for token in tokens:
+        word = token.rstrip(MARKS + "!;")
+        if not word:
+            continue
+        mark = token[len(word):]
+        words.append(word.lower())
+        # The models have no "!"; count it as a full stop
+        labels.append("?" if "?" in mark else next((m for m in mark.replace("!", ".") if m in MARKS), "0"))
+    if n_words:
+        words, labels = words[:n_words], labels[:n_words]
+    return words, labels
+
+
+def load(source: str, n_words: int) -> Tuple[List[str], List[str]]:
+    """`source` is "synthetic" (seed 11) or the path of a punctuated text file"""
+    if source == "synthetic":
+        return synthetic(n_words)
+    return from_text(source, n_words)
+
+
+def output_labels(text: str) -> List[str]:
+    """The label after each word of punctuated output"""
+    return [word[-1] if word[-1] in MARKS else "0" for word in text.split()]
+
+
+def label_accuracy(predicted: Sequence[str], gold: Sequence[str]) -> float:
+    return sum(a == b for a, b in zip(predicted, gold)) / len(gold) if gold else 0.0
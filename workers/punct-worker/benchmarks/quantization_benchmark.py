@@ -0,0 +1,60 @@
+"""Compare the default and int8 inference modes on a fixed corpus.
+
+For each mode the model is loaded as the worker loads it, and the corpus
+is punctuated with the worker's window settings. Reports throughput, label
+accuracy against the corpus and how often the two modes agree. Run from
+the worker directory:
+
+    python benchmarks/quantization_benchmark.py [--model NAME] [--corpus synthetic|FILE] [--words N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("PUNCT_MODEL", "oliverguhr/fullstop-punctuation-multilingual"))
+    parser.add_argument("--corpus", default="synthetic")
+    parser.add_argument("--words", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # main reads its configuration from the environment at import
+    os.environ["PUNCT_MODEL"] = args.model
+    import main as worker
+    from corpus import label_accuracy, load, output_labels
+    from punctuation import punctuate
+
+    words, gold = load(args.corpus, args.words)
+    text = " ".join(words)
+    print(f"model: {args.model}, corpus: {args.corpus}, {len(words):,} words")
+
+    labels = {}
+    for mode in ("default", "int8"):
+        worker.PUNCT_INFERENCE_MODE = mode
+        worker.startup_timings.clear()
+        model = worker.load_punct_model()
+        punctuate(model, " ".join(words[:50]))
+
+        times = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            output, _ = punctuate(
+                model, text, "en", worker.PUNCT_WINDOW_TOKENS, worker.PUNCT_WINDOW_OVERLAP_TOKENS, worker.PUNCT_MAX_BATCH_SIZE
+            )
+            times.append(time.perf_counter() - started)
+        labels[mode] = output_labels(output)
+        print(
+            f"{mode:8s} {min(times):7.2f}s  {len(words) / min(times):7.0f} words/s  "
+            f"label accuracy {label_accuracy(labels[mode], gold):.4f}  load {worker.startup_timings}"
+        )
+
+    print(f"int8 agrees with default on {label_accuracy(labels['int8'], labels['default']):.4f} of words")
+
+
+if __name__ == "__main__":
+    main()
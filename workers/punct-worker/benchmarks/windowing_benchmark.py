@@ -0,0 +1,53 @@
+"""Throughput and accuracy of windowed punctuation for several window settings.
+
+Runs the blocking punctuate() path over one long transcript with each
+(window tokens, overlap tokens, batch size) setting and reports words per
+second and label accuracy against the corpus. Run from the worker
+directory:
+
+    python benchmarks/windowing_benchmark.py [--model NAME] [--corpus synthetic|FILE] [--words N]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SETTINGS = [(256, 32, 1), (256, 32, 8), (256, 32, 16), (128, 16, 8), (510, 32, 4), (256, 0, 8)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("PUNCT_MODEL", "oliverguhr/fullstop-punctuation-multilingual"))
+    parser.add_argument("--corpus", default="synthetic")
+    parser.add_argument("--words", type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ["PUNCT_MODEL"] = args.model
+    import main as worker
+    from corpus import label_accuracy, load, output_labels
+    from punctuation import punctuate
+
+    words, gold = load(args.corpus, args.words)
+    text = " ".join(words)
+    model = worker.load_punct_model()
+    print(f"model: {args.model}, corpus: {args.corpus}, {len(words):,} words")
+    print(f"all-\"0\" baseline accuracy {Counter(gold)['0'] / len(gold):.4f}")
+
+    for window_tokens, overlap_tokens, batch_size in SETTINGS:
+        started = time.perf_counter()
+        output, confidence = punctuate(model, text, "en", window_tokens, overlap_tokens, batch_size)
+        seconds = time.perf_counter() - started
+        labels = output_labels(output)
+        print(
+            f"window={window_tokens} overlap={overlap_tokens} batch={batch_size}: "
+            f"{len(words) / seconds:8.0f} words/s  {seconds:6.2f}s  "
+            f"label accuracy {label_accuracy(labels, gold):.4f}  aligned {len(labels) == len(gold)}  "
+            f"confidence {confidence:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
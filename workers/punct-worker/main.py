@@ -1,15 +1,47 @@
+import time
+MODULE_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Optional
 import uvicorn
 import os
 from dotenv import load_dotenv
 import re
-from transformers import pipeline
+import asyncio
+
+from batching import PunctuationBatcher
+from sessions import SessionStore
 
 load_dotenv()
 
+PUNCT_MODEL_NAME = os.getenv("PUNCT_MODEL", "oliverguhr/fullstop-punctuation-multilingual")
+# Load the model in the background after startup instead of on first request
+PUNCT_WARMUP = os.getenv("PUNCT_WARMUP", "true").lower() == "true"
+# Long texts are cut into overlapping windows of this many tokens (model limit is 512)
+PUNCT_WINDOW_TOKENS = int(os.getenv("PUNCT_WINDOW_TOKENS", "256"))
+PUNCT_WINDOW_OVERLAP_TOKENS = int(os.getenv("PUNCT_WINDOW_OVERLAP_TOKENS", "32"))
+# Windows from concurrent requests share forward passes of up to this many
+# windows; a batch waits at most PUNCT_BATCH_MAX_WAIT_MS for more to arrive
+PUNCT_MAX_BATCH_SIZE = int(os.getenv("PUNCT_MAX_BATCH_SIZE", "8"))
+PUNCT_BATCH_MAX_WAIT_SECONDS = float(os.getenv("PUNCT_BATCH_MAX_WAIT_MS", "10")) / 1000
+# "default" runs the float32 model; "int8" quantizes its Linear layers for CPU inference
+PUNCT_INFERENCE_MODE = os.getenv("PUNCT_INFERENCE_MODE", "default").lower()
+# Intra-op threads for torch; 0 keeps torch's default of one per core
+PUNCT_NUM_THREADS = int(os.getenv("PUNCT_NUM_THREADS", "0"))
+
+INFERENCE_MODES = ("default", "int8")
+
+# Live transcripts: each update re-runs only the unfinalized tail plus some left context
+session_store = SessionStore(
+    context_words=int(os.getenv("PUNCT_SESSION_CONTEXT_WORDS", "32")),
+    holdback_words=int(os.getenv("PUNCT_SESSION_HOLDBACK_WORDS", "8")),
+    ttl_seconds=float(os.getenv("PUNCT_SESSION_TTL_SECONDS", "3600")),
+    max_bytes=int(os.getenv("PUNCT_SESSION_MAX_MB", "256")) * 1024 * 1024,
+)
+
 app = FastAPI(title="Punctuation Worker", version="1.0.0")
 
 # CORS middleware
@@ -24,46 +56,183 @@ app.add_middleware(
 class PunctuationRequest(BaseModel):
     text: str
     language: Optional[str] = "en"
+    # Live mode: `text` is the whole transcript so far, resent on every update
+    session_id: Optional[str] = None
+
+class PunctuationDiff(BaseModel):
+    start: int
+    removed: str
+    inserted: str
+    finalized_length: int
 
 class PunctuationResponse(BaseModel):
     text: str
     confidence: float
+    diff: Optional[PunctuationDiff] = None
+
+# Punctuation model, loaded lazily so startup and /health are not blocked
+punct_model = None
+punct_batcher = None
+model_state = {"status": "starting", "error": None}
+startup_timings = {}
+model_load_task = None
 
-# Load punctuation model
-try:
-    punct_model = pipeline("token-classification", model="oliverguhr/fullstop-punctuation-multilingual")
-except Exception as e:
-    print(f"Warning: Could not load punctuation model: {e}")
-    punct_model = None
+def load_punct_model():
+    """Import transformers and build the token-classification pipeline (blocking)"""
+    if PUNCT_INFERENCE_MODE not in INFERENCE_MODES:
+        raise ValueError(f"Unknown PUNCT_INFERENCE_MODE {PUNCT_INFERENCE_MODE!r}, expected one of {INFERENCE_MODES}")
+    
+    started = time.perf_counter()
+    import torch
+    from transformers import AutoModelForTokenClassification, AutoTokenizer, pipeline
+    startup_timings["transformers_import_seconds"] = round(time.perf_counter() - started, 3)
+    
+    if PUNCT_NUM_THREADS > 0:
+        torch.set_num_threads(PUNCT_NUM_THREADS)
+    
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(PUNCT_MODEL_NAME)
+    model = AutoModelForTokenClassification.from_pretrained(PUNCT_MODEL_NAME)
+    startup_timings["model_load_seconds"] = round(time.perf_counter() - started, 3)
+    
+    if PUNCT_INFERENCE_MODE == "int8":
+        # Dynamic quantization: int8 weights, activations quantized per batch.
+        # The embedding matrix stays float32.
+        started = time.perf_counter()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        startup_timings["quantize_seconds"] = round(time.perf_counter() - started, 3)
+    
+    return pipeline("token-classification", model=model, tokenizer=tokenizer)
+
+async def _load_model():
+    global punct_model, punct_batcher
+    model_state["status"] = "loading"
+    try:
+        model = await asyncio.to_thread(load_punct_model)
+        punct_batcher = await asyncio.to_thread(
+            PunctuationBatcher, model, PUNCT_MAX_BATCH_SIZE, PUNCT_BATCH_MAX_WAIT_SECONDS
+        )
+        punct_model = model
+        model_state["status"] = "ready"
+    except Exception as e:
+        print(f"Warning: Could not load punctuation model: {e}")
+        model_state["status"] = "failed"
+        model_state["error"] = str(e)
+    startup_timings["ready_seconds"] = round(time.perf_counter() - MODULE_STARTED, 3)
+
+async def ensure_punct_model():
+    """Start loading the model if needed and wait for it; None if loading failed"""
+    global model_load_task
+    if model_load_task is None:
+        model_load_task = asyncio.create_task(_load_model())
+    await asyncio.shield(model_load_task)
+    return punct_model
+
+APP_IMPORTED = time.perf_counter()
+
+@app.on_event("startup")
+async def startup():
+    global model_load_task
+    startup_timings["app_import_seconds"] = round(APP_IMPORTED - MODULE_STARTED, 3)
+    if PUNCT_WARMUP and model_load_task is None:
+        model_load_task = asyncio.create_task(_load_model())
+    elif not PUNCT_WARMUP:
+        startup_timings["ready_seconds"] = round(time.perf_counter() - MODULE_STARTED, 3)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if punct_batcher is not None:
+        punct_batcher.close()
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "punct-worker"}
 
-@app.post("/punctuate", response_model=PunctuationResponse)
+@app.get("/ready")
+async def readiness_check():
+    """Report whether the punctuation model is loaded.
+
+    Without warm-up the model loads on the first request, so the worker
+    reports ready until a load fails.
+    """
+    if PUNCT_WARMUP:
+        ready = model_state["status"] == "ready"
+    else:
+        ready = model_state["status"] != "failed"
+    body = {
+        "service": "punct-worker",
+        "model": PUNCT_MODEL_NAME,
+        "warmup": PUNCT_WARMUP,
+        "inference_mode": PUNCT_INFERENCE_MODE,
+        "num_threads": PUNCT_NUM_THREADS or None,
+        **model_state,
+        "startup_timings": startup_timings,
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+@app.post("/punctuate", response_model=PunctuationResponse, response_model_exclude_none=True)
 async def punctuate_text(request: PunctuationRequest):
+    """Punctuate text; with a session_id, also return the diff against the previous response.
+
+    The first `diff.finalized_length` characters of a session's text will not
+    change in later responses unless the client revises those words.
+    """
     try:
-        if punct_model is None:
+        model = await ensure_punct_model()
+        if model is None:
             # Fallback to rule-based punctuation
             return PunctuationResponse(
                 text=apply_rule_based_punctuation(request.text),
                 confidence=0.7
             )
         
-        # Use ML model for punctuation
-        result = punct_model(request.text)
+        if request.session_id:
+            session = session_store.get_or_create(request.session_id, request.language or "en")
+            async with session.lock:
+                result = await session.update(
+                    request.text, punct_batcher, PUNCT_WINDOW_TOKENS, PUNCT_WINDOW_OVERLAP_TOKENS
+                )
+            session_store.enforce_memory_cap()
+            return PunctuationResponse(
+                text=result["text"],
+                confidence=round(result["confidence"], 4),
+                diff=PunctuationDiff(**result["diff"])
+            )
         
-        # Process model output
-        punctuated_text = process_model_output(request.text, result)
+        # Use ML model for punctuation, batched with concurrent requests
+        punctuated_text, confidence = await punct_batcher.punctuate(
+            request.text,
+            request.language or "en",
+            PUNCT_WINDOW_TOKENS,
+            PUNCT_WINDOW_OVERLAP_TOKENS,
+        )
         
         return PunctuationResponse(
             text=punctuated_text,
-            confidence=0.9
+            confidence=round(confidence, 4)
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/batching/stats")
+async def batching_stats():
+    """Dynamic batching limits, batch-size histogram and latency histograms"""
+    if punct_batcher is None:
+        return {"model_status": model_state["status"]}
+    return {"model_status": model_state["status"], **punct_batcher.stats()}
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    if not session_store.remove(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return {"session_id": session_id, "ended": True}
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Live session count, memory use and expiry"""
+    return session_store.stats()
+
 def apply_rule_based_punctuation(text: str) -> str:
     """Apply rule-based punctuation as fallback"""
     # Basic sentence ending detection
@@ -87,12 +256,6 @@ def apply_rule_based_punctuation(text: str) -> str:
     
     return ' '.join(punctuated_sentences)
 
-def process_model_output(original_text: str, model_output: List[dict]) -> str:
-    """Process model output to add punctuation"""
-    # This is a simplified implementation
-    # In practice, you'd need to handle the specific model output format
-    return original_text + "."
-
 @app.post("/clean")
 async def clean_text(request: PunctuationRequest):
     """Clean text by removing filler words and normalizing"""
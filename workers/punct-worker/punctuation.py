@@ -0,0 +1,166 @@
+import bisect
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Labels of the fullstop models: "0" means no punctuation after the word
+NO_PUNCTUATION = "0"
+SENTENCE_END = {".", "?", "!"}
+
+# Punctuation the model predicts; stripped from the input so it is not doubled
+PREDICTED_MARKS = ".,?!:;-"
+
+# English pronoun forms written with a capital I
+CAPITALIZED_EN = {"i", "i'm", "i've", "i'll", "i'd"}
+
+Window = Tuple[int, int]
+
+
+def split_words(text: str) -> List[str]:
+    """Whitespace words with trailing punctuation removed; bare marks are dropped"""
+    words = []
+    for word in text.split():
+        word = word.rstrip(PREDICTED_MARKS)
+        if word:
+            words.append(word)
+    return words
+
+
+def plan_windows(token_counts: Sequence[int], max_tokens: int, overlap_tokens: int) -> List[Window]:
+    """Split words into (start, end) windows of at most `max_tokens` tokens.
+
+    Consecutive windows share about `overlap_tokens` tokens of words so that
+    words near a cut still get context on both sides.
+    """
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    windows: List[Window] = []
+    start = 0
+    while start < len(token_counts):
+        end = start
+        used = 0
+        # A single word longer than the budget still gets its own window
+        while end < len(token_counts) and (end == start or used + token_counts[end] <= max_tokens):
+            used += token_counts[end]
+            end += 1
+        windows.append((start, end))
+        if end >= len(token_counts):
+            break
+
+        next_start = end
+        shared = 0
+        while next_start > start + 1 and shared + token_counts[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            shared += token_counts[next_start]
+        start = next_start
+    return windows
+
+
+def word_labels(words: Sequence[str], tokens: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """(label, score) per word of a window from the pipeline's token output.
+
+    A word takes the label of its last sub-token, which is where the model
+    puts the punctuation that follows the word. Tokens are placed by their
+    end offset, since a word's first piece may include the space before it.
+    """
+    starts = []
+    offset = 0
+    for word in words:
+        starts.append(offset)
+        offset += len(word) + 1
+
+    labels = [(NO_PUNCTUATION, 1.0)] * len(words)
+    for token in tokens:
+        if token["end"] <= token["start"]:
+            continue
+        index = bisect.bisect_right(starts, token["end"] - 1) - 1
+        if index >= 0:
+            labels[index] = (token["entity"], float(token["score"]))
+    return labels
+
+
+def merge_windows(windows: Sequence[Window], window_labels: Sequence[List[Tuple[str, float]]]) -> List[Tuple[str, float]]:
+    """One (label, score) per word, taken from the window where it is most central.
+
+    Where two windows overlap, the first half of the shared words comes from
+    the earlier window and the rest from the later one, so no word is ever
+    labelled from the edge of a window when a better-centred one exists.
+    """
+    merged: List[Tuple[str, float]] = []
+    for index, ((start, end), labels) in enumerate(zip(windows, window_labels)):
+        take_from = len(merged)
+        take_to = end
+        if index + 1 < len(windows):
+            next_start = windows[index + 1][0]
+            take_to = max(take_from, (next_start + end) // 2)
+        merged.extend(labels[take_from - start:take_to - start])
+    return merged
+
+
+def restore_text(words: Sequence[str], labels: Sequence[Tuple[str, float]], language: str = "en") -> str:
+    """Join words with their predicted punctuation and capitalize sentence starts"""
+    pieces = []
+    capitalize = True
+    for word, (label, _) in zip(words, labels):
+        if capitalize:
+            word = word[0].upper() + word[1:]
+        elif language == "en" and word.lower() in CAPITALIZED_EN:
+            word = "I" + word[1:]
+        if label != NO_PUNCTUATION:
+            word += label
+        pieces.append(word)
+        capitalize = label in SENTENCE_END
+
+    # Always close the last sentence
+    if pieces and not capitalize:
+        last_label = labels[len(pieces) - 1][0]
+        if last_label != NO_PUNCTUATION:
+            pieces[-1] = pieces[-1][:-len(last_label)]
+        pieces[-1] += "."
+    return " ".join(pieces)
+
+
+def plan_words(tokenizer, words: Sequence[str], window_tokens: int, overlap_tokens: int) -> List[Window]:
+    """Overlapping windows over `words` that fit the model"""
+    if not words:
+        return []
+    token_counts = [len(ids) for ids in tokenizer(list(words), add_special_tokens=False)["input_ids"]]
+    # Leave room for the <s> and </s> tokens the pipeline adds
+    return plan_windows(token_counts, window_tokens - 2, overlap_tokens)
+
+
+def window_texts(words: Sequence[str], windows: Sequence[Window]) -> List[str]:
+    return [" ".join(words[start:end]) for start, end in windows]
+
+
+def label_windows(
+    words: Sequence[str],
+    windows: Sequence[Window],
+    outputs: Sequence[List[Dict[str, Any]]],
+) -> List[Tuple[str, float]]:
+    """One (label, score) per word from the pipeline output of each window"""
+    window_labels = [word_labels(words[start:end], tokens) for (start, end), tokens in zip(windows, outputs)]
+    return merge_windows(windows, window_labels)
+
+
+def mean_score(labels: Sequence[Tuple[str, float]]) -> float:
+    return sum(score for _, score in labels) / len(labels) if labels else 0.0
+
+
+def punctuate(
+    model,
+    text: str,
+    language: str = "en",
+    window_tokens: int = 256,
+    overlap_tokens: int = 32,
+    batch_size: int = 8,
+) -> Tuple[str, float]:
+    """Punctuate `text` with a token-classification pipeline (blocking).
+
+    The text is cut into overlapping windows that fit the model, the windows
+    are run through the pipeline in batches, and the per-word labels are
+    merged back. Returns the text and the mean score of the chosen labels.
+    """
+    words = split_words(text)
+    windows = plan_words(model.tokenizer, words, window_tokens, overlap_tokens)
+    if not windows:
+        return "", 0.0
+    labels = label_windows(words, windows, model(window_texts(words, windows), batch_size=batch_size))
+    return restore_text(words, labels, language), mean_score(labels)
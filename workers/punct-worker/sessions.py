@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from batching import PunctuationBatcher
+from punctuation import SENTENCE_END, mean_score, restore_text, split_words
+
+# Rough per-word cost of the word and label lists, for the memory cap
+WORD_OVERHEAD_BYTES = 160
+
+
+def common_prefix(old: List[str], new: List[str]) -> int:
+    length = min(len(old), len(new))
+    for index in range(length):
+        if old[index] != new[index]:
+            return index
+    return length
+
+
+def text_diff(old: str, new: str) -> Dict[str, Any]:
+    """Where `new` departs from `old`, and what replaces the rest"""
+    start = 0
+    length = min(len(old), len(new))
+    while start < length and old[start] == new[start]:
+        start += 1
+    return {"start": start, "removed": old[start:], "inserted": new[start:]}
+
+
+def join_text(head: str, tail: str) -> str:
+    return f"{head} {tail}" if head and tail else head or tail
+
+
+class PunctuationSession:
+    """Punctuation of a live transcript that the client resends as it grows.
+
+    Sentences that end at least `holdback_words` words before the end of the
+    transcript are finalized: their text is kept and never re-run. Each
+    update only runs the model over the unfinalized tail plus
+    `context_words` words before it. If the client revises words inside
+    finalized text, finalization rolls back to the last sentence end before
+    the first changed word.
+    """
+
+    def __init__(self, session_id: str, language: str, context_words: int, holdback_words: int):
+        self.session_id = session_id
+        self.language = language
+        self.context_words = context_words
+        self.holdback_words = holdback_words
+        self.words: List[str] = []
+        self.labels: List[Tuple[str, float]] = []
+        self.finalized = 0
+        self.final_text = ""
+        self.text = ""
+        self.lock = asyncio.Lock()
+        self.updates = 0
+        self.model_words = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.text) + len(self.final_text) + len(self.words) * WORD_OVERHEAD_BYTES
+
+    def _rewind(self, changed_at: int) -> None:
+        """Unfinalize everything from the sentence containing word `changed_at`"""
+        finalized = 0
+        for index in range(min(changed_at, self.finalized) - 1, -1, -1):
+            if self.labels[index][0] in SENTENCE_END:
+                finalized = index + 1
+                break
+        self.finalized = finalized
+        self.final_text = restore_text(self.words[:finalized], self.labels[:finalized], self.language)
+
+    async def update(self, text: str, batcher: PunctuationBatcher, window_tokens: int, overlap_tokens: int) -> Dict[str, Any]:
+        words = split_words(text)
+        self.updates += 1
+
+        if words != self.words:
+            changed_at = common_prefix(self.words, words)
+            if changed_at < self.finalized:
+                self._rewind(changed_at)
+
+            start = max(0, self.finalized - self.context_words)
+            tail_labels = await batcher.label(words[start:], window_tokens, overlap_tokens)
+            self.model_words += len(words) - start
+            # Context words only inform the model; their labels stay as finalized
+            self.labels = self.labels[:self.finalized] + tail_labels[self.finalized - start:]
+            self.words = words
+
+            finalized = self.finalized
+            for index in range(self.finalized, len(words) - self.holdback_words):
+                if self.labels[index][0] in SENTENCE_END:
+                    finalized = index + 1
+            if finalized > self.finalized:
+                sentences = restore_text(words[self.finalized:finalized], self.labels[self.finalized:finalized], self.language)
+                self.final_text = join_text(self.final_text, sentences)
+                self.finalized = finalized
+
+        tail = restore_text(self.words[self.finalized:], self.labels[self.finalized:], self.language)
+        previous, self.text = self.text, join_text(self.final_text, tail)
+        return {
+            "text": self.text,
+            "confidence": mean_score(self.labels),
+            "diff": {**text_diff(previous, self.text), "finalized_length": len(self.final_text)},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "words": len(self.words),
+            "finalized_words": self.finalized,
+            "updates": self.updates,
+            "model_words": self.model_words,
+            "size_bytes": self.size_bytes,
+        }
+
+
+class SessionStore:
+    """Live punctuation sessions, dropped after `ttl_seconds` without an update
+    or, least recently used first, when together they exceed `max_bytes`"""
+
+    def __init__(self, context_words: int, holdback_words: int, ttl_seconds: float, max_bytes: int):
+        self.context_words = context_words
+        self.holdback_words = holdback_words
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sessions: "OrderedDict[str, PunctuationSession]" = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, session_id: str) -> Optional[PunctuationSession]:
+        self.expire()
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str, language: str) -> PunctuationSession:
+        session = self.get(session_id)
+        if session is None:
+            session = PunctuationSession(session_id, language, self.context_words, self.holdback_words)
+            self.sessions[session_id] = session
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+    def expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Least recently used first, so stop at the first live session
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_used > cutoff:
+                break
+            self.sessions.popitem(last=False)
+            self.expired += 1
+
+    def enforce_memory_cap(self) -> None:
+        """Evict least recently used sessions, never the most recent one"""
+        total = sum(session.size_bytes for session in self.sessions.values())
+        while total > self.max_bytes and len(self.sessions) > 1:
+            _, session = self.sessions.popitem(last=False)
+            total -= session.size_bytes
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self.expire()
+        return {
+            "sessions": len(self.sessions),
+            "size_bytes": sum(session.size_bytes for session in self.sessions.values()),
+            "max_bytes": self.max_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttl_seconds": self.ttl_seconds,
+            "context_words": self.context_words,
+            "holdback_words": self.holdback_words,
+        }